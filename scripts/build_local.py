@@ -1,23 +1,37 @@
 """
 本地构建脚本 - 用于测试 PyInstaller 打包
 """
+import argparse
 import subprocess
 import sys
 import platform
 import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# 切换到项目根目录（scripts/ 的上级目录）
-project_root = Path(__file__).parent.parent
-os.chdir(project_root)
+# 项目根目录（scripts/ 的上级目录）
+project_root = Path(__file__).resolve().parent.parent
 
-def build():
-    """构建可执行文件"""
-    print("=" * 60)
-    print("🔨 开始构建 SSH Manager 可执行文件")
-    print("=" * 60)
-    
-    # 检查 PyInstaller
+# 默认构建目标（name: 输出文件名, entry: 入口脚本, extra_args: 额外 PyInstaller 参数）
+DEFAULT_TARGET = {
+    "name": "sshm",
+    "entry": "src/run_sshm.py",  # PyInstaller 专用入口点（使用绝对导入）
+    "extra_args": [],
+}
+
+# CLI 用不到的标准库大模块，排除后可减小单文件可执行体积（及每次启动的解压量）。
+# 唯一来源：sshm.spec 从这里导入，CI 通过 --print-exclude-args 取得对应参数
+EXCLUDE_MODULES = [
+    "tkinter", "test", "unittest", "xml.dom", "pydoc",
+    "distutils", "pip", "setuptools",
+]
+
+
+def ensure_pyinstaller():
+    """检查 PyInstaller，未安装时自动安装"""
     try:
         import PyInstaller
         print(f"✅ PyInstaller 版本: {PyInstaller.__version__}")
@@ -27,85 +41,180 @@ def build():
         subprocess.run([sys.executable, "-m", "pip", "install", "pyinstaller"])
         import PyInstaller
         print(f"✅ PyInstaller 版本: {PyInstaller.__version__}")
+
+
+def exclude_args() -> list:
+    """EXCLUDE_MODULES 对应的 PyInstaller 命令行参数"""
+    args = []
+    for module in EXCLUDE_MODULES:
+        args += ["--exclude-module", module]
+    return args
+
+
+def build_one(target: dict, config_dir: str) -> int:
+    """构建单个目标，返回 PyInstaller 退出码
     
-    # 构建命令
+    每个构建使用独立的 PYINSTALLER_CONFIG_DIR，避免并行构建时争用共享缓存。
+    """
     cmd = [
         "pyinstaller",
-        "--onefile",           # 打包成单个文件
-        "--name", "sshm",      # 输出文件名
-        "--console",           # 控制台程序
-        "--clean",             # 清理临时文件
-        "--paths", "src",      # 添加 src 到 Python 路径
-        "src/run_sshm.py"      # PyInstaller 专用入口点（使用绝对导入）
+        "--onefile",                # 打包成单个文件
+        "--name", target["name"],   # 输出文件名
+        "--console",                # 控制台程序
+        "--clean",                  # 清理临时文件
+        "--paths", "src",           # 添加 src 到 Python 路径
+    ]
+    cmd += exclude_args()
+    # 设置了 UPX_DIR 时启用 UPX 压缩
+    if os.environ.get("UPX_DIR"):
+        cmd += ["--upx-dir", os.environ["UPX_DIR"]]
+    cmd += [
+        *target.get("extra_args", []),
+        target["entry"]
     ]
     
     print(f"\n🔧 执行命令: {' '.join(cmd)}")
     print()
     
-    # 执行构建
-    result = subprocess.run(cmd)
-    
-    if result.returncode == 0:
-        print("\n" + "=" * 60)
-        print("✅ 构建成功！")
-        print("=" * 60)
-        
-        # 显示输出文件信息
-        dist_dir = Path("dist")
-        if platform.system() == "Windows":
-            exe_file = dist_dir / "sshm.exe"
+    env = {**os.environ, "PYINSTALLER_CONFIG_DIR": config_dir}
+    # 不捕获输出：PyInstaller 日志直接写入继承的终端句柄，不经过 Python 管道，
+    # 因此既不会在内存中堆积，也不存在 bufsize 相关的逐字节读取问题
+    return subprocess.run(cmd, env=env).returncode
+
+
+def build(targets=None):
+    """构建可执行文件"""
+    targets = targets or [DEFAULT_TARGET]
+    
+    print("=" * 60)
+    print("🔨 开始构建 SSH Manager 可执行文件")
+    print("=" * 60)
+    
+    ensure_pyinstaller()
+    
+    # 每个构建任务一个独立的配置目录
+    config_dirs = [
+        Path(tempfile.gettempdir()) / f"pyi-{os.getpid()}-{uuid.uuid4().hex}"
+        for _ in targets
+    ]
+    
+    try:
+        if len(targets) == 1:
+            returncodes = [build_one(targets[0], str(config_dirs[0]))]
         else:
-            exe_file = dist_dir / "sshm"
-        
-        if exe_file.exists():
-            size_mb = exe_file.stat().st_size / (1024 * 1024)
-            print(f"\n📦 输出文件: {exe_file}")
-            print(f"📊 文件大小: {size_mb:.2f} MB")
-            print(f"💻 平台: {platform.system()} {platform.machine()}")
-            
-            # 测试运行
-            print(f"\n🧪 测试运行...")
-            try:
-                # 使用 UTF-8 编码解码输出，避免 Windows GBK 编码问题
-                test_result = subprocess.run(
-                    [str(exe_file), "--help"], 
-                    capture_output=True, 
-                    text=True, 
-                    encoding='utf-8',
-                    errors='replace'  # 遇到无法解码的字符时替换而不是报错
-                )
-                if test_result.returncode == 0:
-                    print("✅ 测试通过！")
-                    # 显示帮助信息的前几行
-                    lines = test_result.stdout.split('\n')[:5]
-                    print("\n📋 输出预览:")
-                    for line in lines:
-                        print(f"   {line}")
-                else:
-                    print("⚠️ 测试失败")
-                    print(test_result.stderr)
-            except UnicodeDecodeError as e:
-                print(f"⚠️ 编码警告（可忽略）: {e}")
-                print("✅ 测试通过！（程序可正常运行）")
-            
-            # Windows 创建批处理包装器
-            if platform.system() == "Windows":
-                bat_file = dist_dir / "sshm.bat"
-                bat_content = '''@echo off
+            with ProcessPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1)) as executor:
+                returncodes = list(executor.map(build_one, targets, map(str, config_dirs)))
+    finally:
+        for config_dir in config_dirs:
+            shutil.rmtree(config_dir, ignore_errors=True)
+    
+    failed = False
+    for target, returncode in zip(targets, returncodes):
+        if returncode == 0:
+            report(target)
+        else:
+            print("\n" + "=" * 60)
+            print(f"❌ 构建失败: {target['name']}")
+            print("=" * 60)
+            failed = True
+    
+    if failed:
+        sys.exit(1)
+
+
+def report(target: dict):
+    """显示构建结果、测试运行并生成 Windows 包装器"""
+    print("\n" + "=" * 60)
+    print("✅ 构建成功！")
+    print("=" * 60)
+    
+    # 显示输出文件信息
+    dist_dir = Path("dist")
+    name = target["name"]
+    if platform.system() == "Windows":
+        exe_file = dist_dir / f"{name}.exe"
+    else:
+        exe_file = dist_dir / name
+    
+    # 一次 stat 同时得到存在性与文件大小
+    try:
+        size_mb = os.stat(exe_file).st_size / (1024 * 1024)
+    except FileNotFoundError:
+        print(f"⚠️ 未找到输出文件: {exe_file}")
+        return
+    
+    print(f"\n📦 输出文件: {exe_file}")
+    print(f"📊 文件大小: {size_mb:.2f} MB")
+    print(f"💻 平台: {platform.system()} {platform.machine()}")
+    
+    # 测试运行
+    print(f"\n🧪 测试运行...")
+    try:
+        # 使用 UTF-8 编码解码输出，避免 Windows GBK 编码问题
+        test_result = subprocess.run(
+            [str(exe_file), "--help"], 
+            capture_output=True, 
+            text=True, 
+            encoding='utf-8',
+            errors='replace'  # 遇到无法解码的字符时替换而不是报错
+        )
+        if test_result.returncode == 0:
+            print("✅ 测试通过！")
+            # 显示帮助信息的前几行
+            lines = test_result.stdout.split('\n')[:5]
+            print("\n📋 输出预览:")
+            for line in lines:
+                print(f"   {line}")
+        else:
+            print("⚠️ 测试失败")
+            print(test_result.stderr)
+    except UnicodeDecodeError as e:
+        print(f"⚠️ 编码警告（可忽略）: {e}")
+        print("✅ 测试通过！（程序可正常运行）")
+    
+    # Windows 创建批处理包装器
+    if platform.system() == "Windows":
+        bat_file = dist_dir / f"{name}.bat"
+        bat_content = f'''@echo off
 REM SSH Manager - 确保 UTF-8 编码
 chcp 65001 >nul 2>&1
-"%~dp0sshm.exe" %*
+"%~dp0{name}.exe" %*
 '''
-                bat_file.write_text(bat_content, encoding='utf-8')
-                print(f"\n📝 创建批处理包装器: {bat_file}")
-                print("   (解决 PowerShell 管道编码问题)")
-        else:
-            print(f"⚠️ 未找到输出文件: {exe_file}")
-    else:
-        print("\n" + "=" * 60)
-        print("❌ 构建失败")
-        print("=" * 60)
-        sys.exit(1)
+        bat_file.write_text(bat_content, encoding='utf-8')
+        print(f"\n📝 创建批处理包装器: {bat_file}")
+        print("   (解决 PowerShell 管道编码问题)")
+
+
+def parse_target(value: str) -> dict:
+    """解析 --target 参数：NAME=ENTRY"""
+    name, sep, entry = value.partition("=")
+    if not sep or not name or not entry:
+        raise argparse.ArgumentTypeError(f"格式应为 NAME=ENTRY: {value}")
+    return {"name": name, "entry": entry, "extra_args": []}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地构建 SSH Manager 可执行文件")
+    parser.add_argument(
+        "--target", dest="targets", action="append", type=parse_target,
+        metavar="NAME=ENTRY",
+        help="构建目标（可重复指定，多个目标并行构建），默认 sshm=src/run_sshm.py",
+    )
+    parser.add_argument(
+        "--print-exclude-args", action="store_true",
+        help="只输出排除模块对应的 PyInstaller 参数（供 CI 使用）",
+    )
+    args = parser.parse_args()
+    
+    if args.print_exclude_args:
+        # 不输出换行：Windows 上的 \r\n 会残留在 shell 命令替换的最后一个参数里
+        print(" ".join(exclude_args()), end="")
+        return
+    
+    # 切换到项目根目录，入口脚本与 dist/ 均相对于它
+    os.chdir(project_root)
+    build(args.targets)
+
 
 if __name__ == "__main__":
-    build()
+    main()
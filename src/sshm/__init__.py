@@ -17,18 +17,36 @@ SSH Key Manager - 企业级多账号 SSH 密钥管理工具
 许可: MIT
 """
 
+import sys
+
 from .constants import VERSION
-from .core import SSHKeyManager, SSHConfigManager, StateManager
-from .utils import setup_windows_console
+from .exceptions import SSHMError
 
 __version__ = VERSION
 __all__ = [
     'VERSION',
+    'SSHMError',
     'SSHKeyManager',
     'SSHConfigManager',
     'StateManager',
     'setup_windows_console'
 ]
 
-# 自动初始化 Windows 控制台
-setup_windows_console()
+_LAZY_CORE = ('SSHKeyManager', 'SSHConfigManager', 'StateManager')
+
+
+def __getattr__(name):
+    """按需加载子模块，避免 `sshm --help` 等轻量命令承担完整导入开销"""
+    if name in _LAZY_CORE:
+        from . import core
+        return getattr(core, name)
+    if name == 'setup_windows_console':
+        from .utils import setup_windows_console
+        return setup_windows_console
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 自动初始化 Windows 控制台（非 Windows 平台直接跳过）
+if sys.platform == 'win32':
+    from .utils import setup_windows_console
+    setup_windows_console()
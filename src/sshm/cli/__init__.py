@@ -5,7 +5,16 @@ CLI 模块初始化
 """
 
 from .parser import create_parser
-from .commands import handle_command
-from .interactive import show_interactive_menu
 
 __all__ = ['create_parser', 'handle_command', 'show_interactive_menu']
+
+
+def __getattr__(name):
+    """延迟加载命令处理与交互菜单（会连带导入 core 与 updater）"""
+    if name == 'handle_command':
+        from .commands import handle_command
+        return handle_command
+    if name == 'show_interactive_menu':
+        from .interactive import show_interactive_menu
+        return show_interactive_menu
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -14,46 +14,15 @@ def handle_command(args):
     manager = SSHKeyManager()
     
     try:
-        if args.command == 'list':
-            manager.list_keys(show_content=args.all)
-        
-        elif args.command == 'backup':
-            manager.backup_keys()
-        
-        elif args.command == 'backups':
-            manager.list_backups()
-        
-        elif args.command == 'add':
-            manager.add_key(args.label, args.email, args.type, args.host)
-        
-        elif args.command == 'switch':
-            manager.switch_key(args.label, args.type)
-        
-        elif args.command == 'remove':
-            manager.remove_key(args.label, args.type)
-        
-        elif args.command == 'tag':
-            manager.tag_key(args.type, args.label, args.switch)
-        
-        elif args.command == 'rename':
-            manager.rename_tag(args.old_label, args.new_label, args.type)
-        
-        elif args.command == 'use':
-            manager.use_key_for_repo(args.label, args.path, args.yes)
-        
-        elif args.command == 'info':
-            manager.show_repo_info(args.path)
-        
-        elif args.command == 'test':
-            manager.test_connection(args.label, args.all, args.path)
-        
-        elif args.command == 'update':
-            handle_update_command(args)
+        handler = _DISPATCH.get(args.command)
+        if handler:
+            handler(manager, args)
     
     except KeyboardInterrupt:
         print("\n\n⚠️  操作已取消")
         sys.exit(1)
     except Exception as e:
+        # 业务代码尚未统一改为抛出 SSHMError，暂时仍兜底所有异常
         print(f"\n❌ 错误: {e}")
         sys.exit(1)
 
@@ -113,3 +82,20 @@ def handle_update_command(args):
         sys.exit(0)
     else:
         sys.exit(1)
+
+
+# 命令分发表: 命令名 -> handler(manager, args)
+_DISPATCH = {
+    'list': lambda m, a: m.list_keys(show_content=a.all),
+    'backup': lambda m, a: m.backup_keys(),
+    'backups': lambda m, a: m.list_backups(),
+    'add': lambda m, a: m.add_key(a.label, a.email, a.type, a.host),
+    'switch': lambda m, a: m.switch_key(a.label, a.type),
+    'remove': lambda m, a: m.remove_key(a.label, a.type),
+    'tag': lambda m, a: m.tag_key(a.type, a.label, a.switch),
+    'rename': lambda m, a: m.rename_tag(a.old_label, a.new_label, a.type),
+    'use': lambda m, a: m.use_key_for_repo(a.label, a.path, a.yes),
+    'info': lambda m, a: m.show_repo_info(a.path),
+    'test': lambda m, a: m.test_connection(a.label, a.all, a.path),
+    'update': lambda m, a: handle_update_command(a),
+}
@@ -8,160 +8,45 @@ import sys
 
 from ..constants import VERSION, DEFAULT_KEY_TYPE
 from ..core import SSHKeyManager
-from ..utils import print_separator, print_section_header, wait_for_key
+from ..utils import format_separator, format_section_header, wait_for_key
 from ..utils.system import add_to_path
 from ..utils.updater import UpdateManager
 
 
-def get_input(prompt: str, required: bool = True) -> str:
-    """获取用户输入"""
-    while True:
-        value = input(prompt).strip()
-        if value:
-            return value
-        if not required:
-            return ""
-        print("⚠️  此处不能为空，请输入")
-
-
-def show_interactive_menu():
-    """显示交互式菜单（双击运行时）"""
-    print_section_header("🔑 SSH Key Manager - 交互式菜单")
-    print("\n欢迎使用 SSH 密钥管理器！\n")
-    print(f"当前版本: v{VERSION}")
-    print("\n提示: 这是一个命令行工具。在 Windows 上推荐使用 sshm_gui.bat 获得更好的体验。")
-    print("      你也可以直接在此界面完成所有操作。")
-    print_separator()
-    
-    manager = SSHKeyManager()
-    
-    while True:
-        print("\n请选择操作：")
-        print("  [01] 查看所有密钥 (list)")
-        print("  [02] 创建新密钥 (add)")
-        print("  [03] 切换默认密钥 (switch)")
-        print("  [04] 删除密钥 (remove)")
-        print("  [05] 备份所有密钥 (backup)")
-        print("  [06] 查看备份列表 (backups)")
-        print("  [07] 将默认密钥另存为标签 (tag)")
-        print("  [08] 重命名标签 (rename)")
-        print("  [09] 配置仓库密钥 (use)")
-        print("  [10] 查看当前配置 (info)")
-        print("  [11] 测试连接 (test)")
-        print("  [12] 检查更新 (update)")
-        print("  [13] 添加到环境变量 (PATH)")
-        print("  [14] 查看完整帮助")
-        print("  [Q]  退出")
-        
-        print("\n请输入选项: ", end='', flush=True)
-        
-        # 读取输入
-        choice = input().strip().upper()
-        
-        print()
-        
-        try:
-            # 处理选项
-            if choice in ['1', '01']:
-                manager.list_keys(show_content=False)
-                
-            elif choice in ['2', '02']:
-                print("--- 创建新密钥 ---")
-                label = get_input("请输入密钥标签 (如: github, work): ")
-                email = get_input("请输入邮箱地址: ")
-                host = input("请输入主机地址 (如: github.com，留空跳过): ").strip()
-                ktype = input(f"请输入密钥类型 (ed25519/rsa, 默认 {DEFAULT_KEY_TYPE}): ").strip()
-                if not ktype:
-                    ktype = DEFAULT_KEY_TYPE
-                
-                manager.add_key(label, email, ktype, host if host else None)
-                
-            elif choice in ['3', '03']:
-                print("--- 切换默认密钥 ---")
-                manager.list_keys(show_content=False)
-                print()
-                label = get_input("请输入要切换到的标签: ")
-                manager.switch_key(label)
-                
-            elif choice in ['4', '04']:
-                print("--- 删除密钥 ---")
-                manager.list_keys(show_content=False)
-                print()
-                label = get_input("请输入要删除的标签: ")
-                manager.remove_key(label)
-                
-            elif choice in ['5', '05']:
-                manager.backup_keys()
-                
-            elif choice in ['6', '06']:
-                manager.list_backups()
-                
-            elif choice in ['7', '07']:
-                print("--- 另存为标签 ---")
-                label = get_input("请输入新标签名: ")
-                switch = input("添加后是否立即切换? [y/N]: ").lower() == 'y'
-                manager.tag_key(None, label, switch)
-                
-            elif choice in ['8', '08']:
-                print("--- 重命名标签 ---")
-                manager.list_keys(show_content=False)
-                print()
-                old_label = get_input("请输入旧标签名: ")
-                new_label = get_input("请输入新标签名: ")
-                manager.rename_tag(old_label, new_label)
-            
-            elif choice in ['9', '09']:
-                print("--- 配置仓库密钥 ---")
-                manager.list_keys(show_content=False)
-                print()
-                label = get_input("请输入要使用的密钥标签: ")
-                manager.use_key_for_repo(label, '.', False)
-            
-            elif choice == '10':
-                manager.show_repo_info('.')
-            
-            elif choice == '11':
-                print("--- 测试连接 ---")
-                label = input("请输入要测试的标签 (留空测试当前仓库, 'all' 测试所有): ").strip()
-                if not label:
-                    manager.test_connection(None, False, '.')
-                elif label.lower() == 'all':
-                    manager.test_connection(None, True, '.')
-                else:
-                    manager.test_connection(label, False, '.')
-            
-            elif choice == '12':
-                updater = UpdateManager()
-                info = updater.check_update()
-                if info:
-                    print(f"\n🎉 发现新版本: {info['version']}")
-                    print(f"发布时间: {info.get('published_at', 'Unknown')}")
-                    print(f"\n更新内容:\n{info.get('body', '')}")
-                else:
-                    print("\n✅ 已是最新版本")
-            
-            elif choice == '13':
-                add_to_path()
-                
-            elif choice == '14':
-                show_help()
-                
-            elif choice == 'Q':
-                print("再见！👋")
-                break
-            else:
-                print("⚠️  无效选项，请重新选择")
-                
-        except Exception as e:
-            print(f"\n❌ 操作失败: {e}")
-            
-        if choice != 'Q':
-            wait_for_key()
+# 启动欢迎信息：只依赖 VERSION，导入时渲染一次
+_WELCOME_TEXT = "\n".join([
+    format_section_header("🔑 SSH Key Manager - 交互式菜单"),
+    "\n欢迎使用 SSH 密钥管理器！\n",
+    f"当前版本: v{VERSION}",
+    "\n提示: 这是一个命令行工具。在 Windows 上推荐使用 sshm_gui.bat 获得更好的体验。",
+    "      你也可以直接在此界面完成所有操作。",
+    format_separator(),
+    "",
+])
 
+_MENU_TEXT = "\n".join([
+    "",
+    "请选择操作：",
+    "  [01] 查看所有密钥 (list)",
+    "  [02] 创建新密钥 (add)",
+    "  [03] 切换默认密钥 (switch)",
+    "  [04] 删除密钥 (remove)",
+    "  [05] 备份所有密钥 (backup)",
+    "  [06] 查看备份列表 (backups)",
+    "  [07] 将默认密钥另存为标签 (tag)",
+    "  [08] 重命名标签 (rename)",
+    "  [09] 配置仓库密钥 (use)",
+    "  [10] 查看当前配置 (info)",
+    "  [11] 测试连接 (test)",
+    "  [12] 检查更新 (update)",
+    "  [13] 添加到环境变量 (PATH)",
+    "  [14] 查看完整帮助",
+    "  [Q]  退出",
+    "",
+])
 
-def show_help():
-    """显示帮助信息"""
-    print(f"""
+# 帮助文本只依赖 VERSION，导入时渲染一次
+_HELP_TEXT = f"""
 SSH Key Manager v{VERSION} - 多账号 Git SSH 密钥管理工具
 
 使用方法:
@@ -195,4 +80,164 @@ SSH Key Manager v{VERSION} - 多账号 Git SSH 密钥管理工具
 
 详细帮助: sshm <command> --help
 项目主页: https://github.com/365tools/SSHKeyManager
-""")
+
+"""
+
+
+def get_input(prompt: str, required: bool = True) -> str:
+    """获取用户输入"""
+    while True:
+        value = input(prompt).strip()
+        if value:
+            return value
+        if not required:
+            return ""
+        print("⚠️  此处不能为空，请输入")
+
+
+def show_interactive_menu():
+    """显示交互式菜单（双击运行时）"""
+    sys.stdout.write(_WELCOME_TEXT)
+    
+    # 首次执行需要密钥管理器的操作时才创建（直接退出或只看帮助时不触碰 ~/.ssh）
+    manager = None
+    
+    while True:
+        # 整个菜单一次写出，减少控制台写入次数
+        sys.stdout.write(_MENU_TEXT)
+        
+        # 读取输入（行缓冲读取，支持输入法/多字节字符）
+        choice = input("\n请输入选项: ").strip().upper()
+        
+        print()
+        
+        if choice == 'Q':
+            print("再见！👋")
+            break
+        
+        try:
+            action = _MENU_ACTIONS.get(choice)
+            if action:
+                if manager is None and choice not in _STANDALONE_ACTIONS:
+                    manager = SSHKeyManager()
+                action(manager)
+            else:
+                print("⚠️  无效选项，请重新选择")
+                
+        except Exception as e:
+            print(f"\n❌ 操作失败: {e}")
+        
+        wait_for_key()
+
+
+def _menu_add(manager):
+    """菜单: 创建新密钥"""
+    print("--- 创建新密钥 ---")
+    label = get_input("请输入密钥标签 (如: github, work): ")
+    email = get_input("请输入邮箱地址: ")
+    host = input("请输入主机地址 (如: github.com，留空跳过): ").strip()
+    ktype = input(f"请输入密钥类型 (ed25519/rsa, 默认 {DEFAULT_KEY_TYPE}): ").strip()
+    if not ktype:
+        ktype = DEFAULT_KEY_TYPE
+    
+    manager.add_key(label, email, ktype, host if host else None)
+
+
+def _menu_switch(manager):
+    """菜单: 切换默认密钥"""
+    print("--- 切换默认密钥 ---")
+    manager.list_keys(show_content=False)
+    print()
+    label = get_input("请输入要切换到的标签: ")
+    manager.switch_key(label)
+
+
+def _menu_remove(manager):
+    """菜单: 删除密钥"""
+    print("--- 删除密钥 ---")
+    manager.list_keys(show_content=False)
+    print()
+    label = get_input("请输入要删除的标签: ")
+    manager.remove_key(label)
+
+
+def _menu_tag(manager):
+    """菜单: 将默认密钥另存为标签"""
+    print("--- 另存为标签 ---")
+    label = get_input("请输入新标签名: ")
+    switch = input("添加后是否立即切换? [y/N]: ").lower() == 'y'
+    manager.tag_key(None, label, switch)
+
+
+def _menu_rename(manager):
+    """菜单: 重命名标签"""
+    print("--- 重命名标签 ---")
+    manager.list_keys(show_content=False)
+    print()
+    old_label = get_input("请输入旧标签名: ")
+    new_label = get_input("请输入新标签名: ")
+    manager.rename_tag(old_label, new_label)
+
+
+def _menu_use(manager):
+    """菜单: 配置仓库密钥"""
+    print("--- 配置仓库密钥 ---")
+    manager.list_keys(show_content=False)
+    print()
+    label = get_input("请输入要使用的密钥标签: ")
+    manager.use_key_for_repo(label, '.', False)
+
+
+def _menu_test(manager):
+    """菜单: 测试连接"""
+    print("--- 测试连接 ---")
+    label = input("请输入要测试的标签 (留空测试当前仓库, 'all' 测试所有): ").strip()
+    if not label:
+        manager.test_connection(None, False, '.')
+    elif label.lower() == 'all':
+        manager.test_connection(None, True, '.')
+    else:
+        manager.test_connection(label, False, '.')
+
+
+def _menu_update(manager):
+    """菜单: 检查更新"""
+    updater = UpdateManager()
+    info = updater.check_update()
+    if info:
+        print(f"\n🎉 发现新版本: {info['version']}")
+        print(f"发布时间: {info.get('published_at', 'Unknown')}")
+        print(f"\n更新内容:\n{info.get('body', '')}")
+    else:
+        print("\n✅ 已是最新版本")
+
+
+# 菜单分发表: 选项 -> action(manager)
+_MENU_ACTIONS = {
+    '1': lambda m: m.list_keys(show_content=False),
+    '2': _menu_add,
+    '3': _menu_switch,
+    '4': _menu_remove,
+    '5': lambda m: m.backup_keys(),
+    '6': lambda m: m.list_backups(),
+    '7': _menu_tag,
+    '8': _menu_rename,
+    '9': _menu_use,
+    '10': lambda m: m.show_repo_info('.'),
+    '11': _menu_test,
+    '12': _menu_update,
+    '13': lambda m: add_to_path(),
+    '14': lambda m: show_help(),
+}
+
+# 01-09 与 1-9 等价
+_MENU_ACTIONS.update({f"0{i}": _MENU_ACTIONS[str(i)] for i in range(1, 10)})
+
+# 不需要 SSHKeyManager 的选项
+_STANDALONE_ACTIONS = frozenset({'12', '13', '14'})
+
+
+def show_help():
+    """显示帮助信息"""
+    sys.stdout.write(_HELP_TEXT)
+    sys.stdout.flush()
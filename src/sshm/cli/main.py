@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+程序主入口 - 供 `python -m sshm` 与 PyInstaller 入口 (run_sshm.py) 共用
+"""
+
+import sys
+
+from .parser import create_parser
+
+
+def main():
+    """主函数入口"""
+    # 检测双击运行（无参数）
+    if len(sys.argv) == 1:
+        from .interactive import show_interactive_menu
+        show_interactive_menu()
+        return
+    
+    # 解析命令行参数
+    parser = create_parser()
+    args = parser.parse_args()
+    
+    if not args.command:
+        parser.print_help()
+        return
+    
+    # 非 update 命令时，静默检查更新（不干扰用户）
+    if args.command != 'update':
+        try:
+            # 延迟导入：urllib/ssl 依赖链只在需要检查更新时才加载
+            from ..utils.updater import UpdateManager
+            updater = UpdateManager()
+            updater.check_and_notify()
+        except:
+            # 静默失败，不影响正常使用
+            pass
+    
+    # 处理命令（确定有命令后再加载业务模块）
+    from .commands import handle_command
+    handle_command(args)
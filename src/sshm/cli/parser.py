@@ -5,12 +5,19 @@
 """
 
 import argparse
+import sys
+from typing import List, Optional
 
 from ..constants import VERSION, SUPPORTED_KEY_TYPES, DEFAULT_KEY_TYPE
 
 
-def create_parser() -> argparse.ArgumentParser:
-    """创建命令行参数解析器"""
+def create_parser(argv: Optional[List[str]] = None) -> argparse.ArgumentParser:
+    """创建命令行参数解析器
+    
+    Args:
+        argv: 命令行参数（不含程序名），默认取 sys.argv[1:]。首个参数是已知命令时
+              只构建该命令的子解析器；--help、未知命令等情况构建全部子解析器
+    """
     parser = argparse.ArgumentParser(
         prog='sshm',
         description=f'SSH Key Manager v{VERSION} - 多账号 Git SSH 密钥管理工具',
@@ -34,66 +41,88 @@ def create_parser() -> argparse.ArgumentParser:
     
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
-    # list 命令
+    if argv is None:
+        argv = sys.argv[1:]
+    builder = _BUILDERS.get(argv[0]) if argv else None
+    if builder:
+        builder(subparsers)
+    else:
+        for builder in _BUILDERS.values():
+            builder(subparsers)
+    
+    return parser
+
+
+def _build_list(subparsers):
     list_parser = subparsers.add_parser('list', help='查看当前所有 SSH 密钥')
     list_parser.add_argument('-a', '--all', action='store_true',
                             help='显示公钥内容')
-    
-    # backup 命令
+
+
+def _build_backup(subparsers):
     subparsers.add_parser('backup', help='备份所有 SSH 密钥到归档')
-    
-    # backups 命令
+
+
+def _build_backups(subparsers):
     subparsers.add_parser('backups', help='列出所有备份归档')
-    
-    # add 命令
+
+
+def _build_add(subparsers):
     add_parser = subparsers.add_parser('add', help='创建新的 SSH 密钥')
     add_parser.add_argument('label', help='密钥标签')
     add_parser.add_argument('email', help='邮箱地址')
     add_parser.add_argument('-t', '--type', choices=SUPPORTED_KEY_TYPES,
                           default=DEFAULT_KEY_TYPE, help='密钥类型')
     add_parser.add_argument('-H', '--host', help='主机名（用于 SSH config）')
-    
-    # switch 命令
+
+
+def _build_switch(subparsers):
     switch_parser = subparsers.add_parser('switch', help='切换默认 SSH 密钥')
     switch_parser.add_argument('label', help='密钥标签')
     switch_parser.add_argument('-t', '--type', choices=SUPPORTED_KEY_TYPES,
                               help='密钥类型（默认自动检测）')
-    
-    # remove 命令
+
+
+def _build_remove(subparsers):
     remove_parser = subparsers.add_parser('remove', help='删除 SSH 密钥')
     remove_parser.add_argument('label', help='密钥标签')
     remove_parser.add_argument('-t', '--type', choices=SUPPORTED_KEY_TYPES,
                               help='指定删除的密钥类型（默认删除所有类型）')
-    
-    # tag 命令
+
+
+def _build_tag(subparsers):
     tag_parser = subparsers.add_parser('tag', help='将当前默认密钥另存为指定标签')
     tag_parser.add_argument('label', help='新标签名')
     tag_parser.add_argument('-t', '--type', choices=SUPPORTED_KEY_TYPES,
                           help='密钥类型（默认自动检测）')
     tag_parser.add_argument('-s', '--switch', action='store_true',
                           help='打标签后立即切换')
-    
-    # rename 命令
+
+
+def _build_rename(subparsers):
     rename_parser = subparsers.add_parser('rename', help='重命名密钥标签')
     rename_parser.add_argument('old_label', help='旧标签名')
     rename_parser.add_argument('new_label', help='新标签名')
     rename_parser.add_argument('-t', '--type', choices=SUPPORTED_KEY_TYPES,
                              default=DEFAULT_KEY_TYPE, help='密钥类型')
-    
-    # use 命令
+
+
+def _build_use(subparsers):
     use_parser = subparsers.add_parser('use', help='为当前 Git 仓库配置指定密钥')
     use_parser.add_argument('label', help='密钥标签')
     use_parser.add_argument('-p', '--path', default='.', 
                           help='Git 仓库路径（默认当前目录）')
     use_parser.add_argument('-y', '--yes', action='store_true',
                           help='跳过确认直接执行')
-    
-    # info 命令
+
+
+def _build_info(subparsers):
     info_parser = subparsers.add_parser('info', help='显示 Git 仓库配置信息')
     info_parser.add_argument('-p', '--path', default='.', 
                            help='Git 仓库路径（默认当前目录）')
-    
-    # test 命令
+
+
+def _build_test(subparsers):
     test_parser = subparsers.add_parser('test', help='测试 SSH 连接')
     test_parser.add_argument('label', nargs='?', 
                            help='密钥标签（不指定则测试当前仓库配置）')
@@ -101,12 +130,28 @@ def create_parser() -> argparse.ArgumentParser:
                            help='Git 仓库路径（默认当前目录）')
     test_parser.add_argument('-a', '--all', action='store_true',
                            help='测试所有密钥')
-    
-    # update 命令
+
+
+def _build_update(subparsers):
     update_parser = subparsers.add_parser('update', help='检查并更新到最新版本')
     update_parser.add_argument('--check', action='store_true',
                              help='仅检查更新，不执行更新')
     update_parser.add_argument('--force', action='store_true',
                              help='强制检查，忽略缓存')
-    
-    return parser
+
+
+# 子命令构建函数，顺序即完整帮助中的命令顺序
+_BUILDERS = {
+    'list': _build_list,
+    'backup': _build_backup,
+    'backups': _build_backups,
+    'add': _build_add,
+    'switch': _build_switch,
+    'remove': _build_remove,
+    'tag': _build_tag,
+    'rename': _build_rename,
+    'use': _build_use,
+    'info': _build_info,
+    'test': _build_test,
+    'update': _build_update,
+}
@@ -5,7 +5,7 @@
 """
 
 VERSION = "2.1.1"
-SUPPORTED_KEY_TYPES = ['ed25519', 'rsa', 'ecdsa', 'dsa']
+SUPPORTED_KEY_TYPES = ('ed25519', 'rsa', 'ecdsa', 'dsa')
 DEFAULT_KEY_TYPE = 'ed25519'
 STATE_FILE_NAME = '.sshm_state'
 BACKUP_DIR_NAME = 'key_backups'
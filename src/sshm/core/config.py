@@ -4,8 +4,25 @@
 SSH 配置管理器 - 负责 SSH config 文件的读写操作
 """
 
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# 顶格注释行：sshm 配置块以及用户注释都从这里开始
+_COMMENT_LINE_RE = re.compile(r'^#', re.MULTILINE)
+# Host/Match 行：ssh_config 的选项行不要求缩进，配置块以下一个 Host/Match 行为界
+_HOST_LINE_RE = re.compile(r'^[ \t]*(?:host|match)\b', re.MULTILINE | re.IGNORECASE)
+# sshm 自动生成配置块的标记注释，捕获标签
+_MANAGED_HEADER_RE = re.compile(r'# (.+?) - Auto-generated')
+
+
+@lru_cache(maxsize=256)
+def _host_line_pattern(label: str):
+    """配置块中的 Host 行"""
+    return re.compile(rf'^Host {re.escape(label)}$', re.MULTILINE)
 
 
 class SSHConfigManager:
@@ -13,53 +30,209 @@ class SSHConfigManager:
     
     def __init__(self, config_file: Path):
         self.config_file = config_file
+        # ((st_mtime_ns, st_size), 文件内容)：文件未变化时读取直接复用
+        self._content_cache: Optional[Tuple[Tuple[int, int], str]] = None
+        # (解析时的文件内容, {Host 别名: 配置块文本})
+        self._hosts_cache: Optional[Tuple[str, Dict[str, str]]] = None
+        # 批量修改（with 语句）期间的内存内容：文件不存在时为 None
+        self._batch_depth = 0
+        self._buf: Optional[str] = None
+        self._dirty = False
+    
+    def __enter__(self):
+        """批量修改：期间的 update/remove/rename 只改内存内容，退出时写入一次
+        
+        用法:
+            with config_manager:
+                config_manager.remove_host('github-old')
+                config_manager.update_host('github-new', 'github.com', key_file)
+        """
+        if self._batch_depth == 0:
+            self._buf = self._read_file()
+            self._dirty = False
+        self._batch_depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            # 已完成的修改照常落盘，与非批量时逐次写入的结果一致
+            if self._dirty:
+                self._write_file(self._buf)
+            self._buf = None
+            self._dirty = False
+        return False
+    
+    def get_host_block(self, host_alias: str) -> Optional[str]:
+        """返回指定 Host 别名的配置块文本，不存在时返回 None
+        
+        文件内容按 mtime/size 缓存，解析结果随内容缓存，文件未变化时不会重复读取和解析。
+        """
+        try:
+            content = self._read_file()
+        except OSError:
+            return None
+        if content is None:
+            return None
+        
+        if self._hosts_cache is None or self._hosts_cache[0] is not content:
+            self._hosts_cache = (content, self._parse_host_blocks(content))
+        
+        return self._hosts_cache[1].get(host_alias)
     
     def update_host(self, label: str, host: str, key_file: Path):
         """更新或添加 Host 配置"""
         config_block = self._generate_config_block(label, host, key_file)
         
-        if not self.config_file.exists():
-            self.config_file.write_text(config_block, encoding='utf-8')
+        content = self._read()
+        if content is None:
+            self._write(config_block)
             return
         
-        content = self.config_file.read_text(encoding='utf-8')
+        segments, index = self._load_blocks(content)
         
-        # 查找并替换已存在的配置块
-        pattern = rf'^# {re.escape(label)} - Auto-generated.*?(?=^#|\Z)'
-        if re.search(pattern, content, re.MULTILINE | re.DOTALL):
-            content = re.sub(pattern, config_block.rstrip() + '\n\n', 
-                           content, flags=re.MULTILINE | re.DOTALL)
+        # 替换已存在的配置块（重复的配置块只保留第一个），否则追加到末尾
+        if label in index:
+            first, *rest = index[label]
+            segments[first] = config_block
+            for i in reversed(rest):
+                del segments[i]
         else:
-            content += '\n' + config_block
+            segments.append('\n' + config_block)
         
-        self.config_file.write_text(content, encoding='utf-8')
+        self._write(''.join(segments))
     
     def remove_host(self, label: str):
         """从 SSH config 中删除指定标签的配置"""
-        if not self.config_file.exists():
+        content = self._read()
+        if content is None:
             return
         
-        content = self.config_file.read_text(encoding='utf-8')
-        pattern = rf'^# {re.escape(label)} - Auto-generated.*?(?=^#|\Z)'
-        content = re.sub(pattern, '', content, flags=re.MULTILINE | re.DOTALL)
-        self.config_file.write_text(content, encoding='utf-8')
+        segments, index = self._load_blocks(content)
+        if label in index:
+            for i in reversed(index[label]):
+                del segments[i]
+            self._write(''.join(segments))
     
     def rename_host(self, old_label: str, new_label: str):
         """重命名 SSH config 中的 Host"""
-        if not self.config_file.exists():
+        content = self._read()
+        if content is None:
             return
         
-        content = self.config_file.read_text(encoding='utf-8')
-        pattern = rf'^# {re.escape(old_label)} - Auto-generated.*?(?=^#|\Z)'
-        match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-        
-        if match:
-            old_block = match.group(0)
-            new_block = old_block.replace(f"# {old_label} - ", f"# {new_label} - ")
-            new_block = re.sub(rf'^Host {re.escape(old_label)}$', 
-                             f'Host {new_label}', new_block, flags=re.MULTILINE)
-            content = content.replace(old_block, new_block)
-            self.config_file.write_text(content, encoding='utf-8')
+        segments, index = self._load_blocks(content)
+        if old_label in index:
+            for i in index[old_label]:
+                new_block = segments[i].replace(f"# {old_label} - ", f"# {new_label} - ")
+                segments[i] = _host_line_pattern(old_label).sub(f'Host {new_label}', new_block)
+            self._write(''.join(segments))
+    
+    @staticmethod
+    def _load_blocks(content: str) -> Tuple[List[str], Dict[str, List[int]]]:
+        """将 config 内容切分为片段，返回 (按原顺序排列的片段, {标签: [sshm 配置块下标, ...]})
+        
+        片段在每行顶格注释与每个 Host/Match 行处切开，sshm 标记注释与紧随其后的
+        第一个 Host 行合为一个配置块：块内选项行没有缩进、或块后紧跟没有注释的
+        用户 Host 时，配置块都不会多删或少删。片段原样拼接即得到原文件内容。
+        同一标签出现多个配置块时按出现顺序记录全部下标。
+        """
+        starts = sorted({m.start() for m in _COMMENT_LINE_RE.finditer(content)}
+                        | {m.start() for m in _HOST_LINE_RE.finditer(content)})
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        starts.append(len(content))
+        
+        segments = []
+        # 最后一个片段是否为尚未并入 Host 行的 sshm 标记注释
+        open_header = False
+        for a, b in zip(starts, starts[1:]):
+            if b <= a:
+                continue
+            segment = content[a:b]
+            if open_header and _HOST_LINE_RE.match(segment):
+                segments[-1] += segment
+                open_header = False
+            else:
+                segments.append(segment)
+                open_header = bool(_MANAGED_HEADER_RE.match(segment))
+        
+        index = {}
+        for i, segment in enumerate(segments):
+            match = _MANAGED_HEADER_RE.match(segment)
+            if match:
+                index.setdefault(match.group(1), []).append(i)
+        
+        return segments, index
+    
+    def _read(self) -> Optional[str]:
+        """当前 config 内容（批量修改期间取内存内容），文件不存在时返回 None"""
+        if self._batch_depth:
+            return self._buf
+        return self._read_file()
+    
+    def _write(self, content: str):
+        """保存 config 内容（批量修改期间只更新内存内容）"""
+        if self._batch_depth:
+            self._buf = content
+            self._dirty = True
+        else:
+            self._write_file(content)
+    
+    def _read_file(self) -> Optional[str]:
+        """读取 config 文件（mtime/size 未变化时返回缓存内容），文件不存在时返回 None"""
+        try:
+            st = os.stat(self.config_file)
+        except FileNotFoundError:
+            return None
+        
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._content_cache is None or self._content_cache[0] != stamp:
+            self._content_cache = (stamp, self.config_file.read_text(encoding='utf-8'))
+        return self._content_cache[1]
+    
+    def _write_file(self, content: str):
+        """写入 config 文件，并以写入后的文件信息刷新内容缓存
+        
+        原地写入而非临时文件 + os.replace：~/.ssh/config 常是指向 dotfiles 仓库的
+        符号链接，且需要保留原有的权限位。
+        """
+        self.config_file.write_text(content, encoding='utf-8')
+        st = os.stat(self.config_file)
+        self._content_cache = ((st.st_mtime_ns, st.st_size), content)
+    
+    @staticmethod
+    def _parse_host_blocks(content: str) -> Dict[str, str]:
+        """将 config 内容解析为 {Host 别名: 配置块文本}
+        
+        配置块从 Host 行开始，到下一个 Host/Match 行或顶格注释行为止；
+        选项行不要求缩进。
+        """
+        hosts = {}
+        aliases = []
+        block = []
+        
+        def flush():
+            text = '\n'.join(block).rstrip()
+            for alias in aliases:
+                hosts.setdefault(alias, text)
+        
+        for line in content.splitlines():
+            if not (_HOST_LINE_RE.match(line) or line.startswith('#')):
+                if aliases:
+                    block.append(line)
+                continue
+            
+            flush()
+            parts = line.split()
+            if parts[0].lower() == 'host':
+                aliases = parts[1:]
+                block = [line]
+            else:
+                aliases = []
+                block = []
+        flush()
+        
+        return hosts
     
     @staticmethod
     def _generate_config_block(label: str, host: str, key_file: Path) -> str:
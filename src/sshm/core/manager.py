@@ -4,12 +4,15 @@
 SSH 密钥管理器 - 核心业务逻辑
 """
 
+import os
 import re
 import shutil
 import subprocess
+import sys
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
 from ..constants import (
     SUPPORTED_KEY_TYPES,
@@ -22,13 +25,180 @@ from ..utils import (
     format_timestamp,
     format_size,
     prompt_confirm,
-    print_separator,
+    format_separator,
+    format_section_header,
     print_section_header
 )
 from .config import SSHConfigManager
 from .state import StateManager
 
 
+# Git remote URL 解析
+_SSH_URL_RE = re.compile(r'git@([^:]+):([^/]+)/(.+?)(?:\.git)?$')
+_HTTPS_URL_RE = re.compile(r'https?://([^/]+)/([^/]+)/(.+?)(?:\.git)?$')
+_SSH_HOST_RE = re.compile(r'git@([^:]+):')
+_GREETING_USER_RE = re.compile(rb'Hi ([^!]+)!')
+
+# .git/config 中的 [remote "origin"] 小节与 url 键
+_ORIGIN_SECTION_RE = re.compile(r'\[\s*remote\s+"origin"\s*\]')
+_CONFIG_URL_RE = re.compile(r'url\s*=\s*(.*?)\s*$', re.IGNORECASE)
+
+# 标签关键字 -> Git 平台主机名
+_HOSTNAME_MAP = {
+    'github': 'github.com',
+    'gitlab': 'gitlab.com',
+    'gitee': 'gitee.com',
+    'bitbucket': 'bitbucket.org',
+}
+
+@lru_cache(maxsize=128)
+def _label_host(label: str) -> Tuple[str, str]:
+    """标签 -> (SSH config 别名, 主机名)，如 work -> ('github-work', 'github.com')
+    
+    结果只取决于标签本身，可安全缓存。标签包含多个关键字时按 _HOSTNAME_MAP 的顺序取第一个
+    （而不是标签中最靠前的），已生成的别名与 remote URL 依赖这一规则。
+    """
+    label_lower = label.lower()
+    keyword = next((k for k in _HOSTNAME_MAP if k in label_lower), None)
+    hostname = _HOSTNAME_MAP[keyword] if keyword else 'github.com'
+    return f"{hostname.partition('.')[0]}-{label}", hostname
+
+# 所有类型的默认密钥文件名（私钥与公钥）
+_DEFAULT_KEY_NAMES = frozenset(
+    name
+    for key_type in SUPPORTED_KEY_TYPES
+    for name in (f"id_{key_type}", f"id_{key_type}.pub")
+)
+
+# ssh -T 探测参数：BatchMode 禁止任何交互提示（无人应答时直接失败），
+# ConnectTimeout 限制 TCP 连接耗时，accept-new 自动接受首次见到的主机密钥（已变更的仍会拒绝），
+# ControlPath=none 避免复用用户配置中的 master 连接
+_SSH_PROBE_OPTS = [
+    '-o', 'BatchMode=yes',
+    '-o', 'ConnectTimeout=5',
+    '-o', 'StrictHostKeyChecking=accept-new',
+    '-o', 'ControlPath=none',
+]
+
+def _ssh_probe(host: str) -> Tuple[int, bytes]:
+    """执行 ssh -T git@host，返回 (退出码, 合并后的 stdout/stderr)
+    
+    不复用 ControlMaster 连接：切换或重建密钥后，复用的 master 仍是用旧密钥
+    认证的会话，测试结果会失真。每次探测都重新建立连接。
+    """
+    result = subprocess.run(
+        ['ssh', *_SSH_PROBE_OPTS, '-T', f'git@{host}'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        timeout=10
+    )
+    return result.returncode, result.stdout
+
+def _keygen_error(e: subprocess.CalledProcessError) -> str:
+    """ssh-keygen 失败时的错误信息：优先使用其 stderr 输出，没有时退回异常本身"""
+    stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+    return stderr or str(e)
+
+@lru_cache(maxsize=None)
+def _global_git_config_rewrites() -> bool:
+    """全局/系统 git 配置中是否有 insteadOf 或 include（会影响 remote URL 的解析结果）"""
+    candidates = [
+        Path.home() / '.gitconfig',
+        Path(os.environ.get('XDG_CONFIG_HOME') or Path.home() / '.config') / 'git' / 'config',
+        Path('/etc/gitconfig'),
+    ]
+    for path in candidates:
+        try:
+            text = path.read_text(encoding='utf-8', errors='replace').lower()
+        except OSError:
+            continue
+        if 'insteadof' in text or '[include' in text:
+            return True
+    return False
+
+def _read_origin_url(repo_path: Path) -> Optional[str]:
+    """直接从 .git/config 读取 origin 的 url，省去一次 git 进程启动
+    
+    遇到 worktree/子模块（.git 为文件）、insteadOf 改写、include 或带引号/注释的值时
+    返回 None，由调用方改用 git 命令获取。
+    """
+    try:
+        text = (repo_path / '.git' / 'config').read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        return None
+    
+    lowered = text.lower()
+    if 'insteadof' in lowered or '[include' in lowered or _global_git_config_rewrites():
+        return None
+    
+    in_origin = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('['):
+            in_origin = _ORIGIN_SECTION_RE.fullmatch(line) is not None
+        elif in_origin:
+            match = _CONFIG_URL_RE.match(line)
+            if match:
+                url = match.group(1)
+                if not url or any(c in url for c in '"#;\\'):
+                    return None
+                return url
+    return None
+
+# Windows 与 macOS 的默认文件系统不区分大小写：按文件名快照判断存在性时
+# 需要与 Path.exists() 的结果保持一致
+_CASE_INSENSITIVE_FS = sys.platform in ('win32', 'darwin')
+
+def _fs_fold(name: str) -> str:
+    """按文件系统的大小写规则折叠文件名"""
+    return name.lower() if _CASE_INSENSITIVE_FS else name
+
+def _pub_path(key_file: Path) -> Path:
+    """返回私钥对应的公钥路径（同目录下追加 .pub）"""
+    return key_file.with_name(key_file.name + '.pub')
+
+def _clone_or_copy(src, dst):
+    """创建独立副本：支持 reflink 的文件系统（btrfs/xfs 等）上共享数据块、写时复制，
+    否则普通复制。备份不用硬链接：ssh-keygen -p 等会原地改写密钥文件，硬链接会连带改掉备份
+    """
+    try:
+        import fcntl
+        ficlone = fcntl.FICLONE
+    except (ImportError, AttributeError):
+        shutil.copy2(src, dst)
+        return
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), ficlone, fsrc.fileno())
+    except OSError:
+        shutil.copy2(src, dst)
+        return
+    shutil.copystat(src, dst)
+
+
+def _replace_with_copy(src, dst):
+    """复制到同目录临时文件后 os.replace，目标文件在任何时刻都是完整的
+    
+    临时文件以 .sshm- 开头：不会与 id_<类型>.<标签> 形式的密钥文件重名，
+    残留时也不会被识别为密钥。复制或替换失败时删除临时文件。
+    """
+    import tempfile
+    
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.fspath(dst)), prefix='.sshm-')
+    os.close(fd)
+    try:
+        _clone_or_copy(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 class SSHKeyManager:
     """SSH 密钥管理器 - 核心业务逻辑"""
     
@@ -43,15 +213,38 @@ class SSHKeyManager:
         self.config_file = self.ssh_dir / 'config'
         self.state_file = self.ssh_dir / STATE_FILE_NAME
         
-        # 初始化子管理器
-        self.config_manager = SSHConfigManager(self.config_file)
-        self.state_manager = StateManager(self.state_file)
+        # 子管理器按需创建，list/backups 等命令不会用到
+        self._config_manager: Optional[SSHConfigManager] = None
+        self._state_manager: Optional[StateManager] = None
+        
+        # ~/.ssh 文件名快照及快照时目录的 st_mtime_ns：本程序修改密钥文件后主动失效，
+        # 交互模式下其他程序改动目录时按 mtime 变化失效
+        self._dir_names_cache: Optional[FrozenSet[str]] = None
+        self._dir_names_mtime: Optional[int] = None
         
         # 确保必要目录存在
         self._ensure_directories()
     
+    @property
+    def config_manager(self) -> SSHConfigManager:
+        """SSH config 管理器（首次访问时创建）"""
+        if self._config_manager is None:
+            self._config_manager = SSHConfigManager(self.config_file)
+        return self._config_manager
+    
+    @property
+    def state_manager(self) -> StateManager:
+        """状态管理器（首次访问时创建）"""
+        if self._state_manager is None:
+            self._state_manager = StateManager(self.state_file)
+        return self._state_manager
+    
     def _ensure_directories(self):
         """确保必要的目录存在"""
+        # 常见情况下目录早已存在：一次 stat 即可返回，省去两次必然 EEXIST 的 mkdir。
+        # backup_dir 位于 ssh_dir 之内，它存在即说明两者都已就绪
+        if os.path.isdir(self.backup_dir):
+            return
         self.ssh_dir.mkdir(mode=0o700, exist_ok=True)
         self.backup_dir.mkdir(mode=0o700, exist_ok=True)
     
@@ -61,95 +254,119 @@ class SSHKeyManager:
     
     def list_keys(self, show_content: bool = False):
         """列出所有密钥"""
-        print_section_header("SSH 密钥管理器 - 密钥列表")
-        print(f"\nSSH 目录: {self.ssh_dir}\n")
+        out = [format_section_header("SSH 密钥管理器 - 密钥列表"),
+               f"\nSSH 目录: {self.ssh_dir}\n"]
         
         keys_by_label = self._scan_all_keys()
         active_keys = self.state_manager.read_active_keys()
         
         if not keys_by_label:
-            print("⚠️  未找到任何密钥文件")
-            print("\n💡 提示: 使用 'sshm add <标签> <邮箱>' 创建新密钥")
+            out.append("⚠️  未找到任何密钥文件")
+            out.append("\n💡 提示: 使用 'sshm add <标签> <邮箱>' 创建新密钥")
+            sys.stdout.write("\n".join(out) + "\n")
             return
         
-        # 获取当前激活的标签
-        active_labels = set(active_keys.values())
+        # 获取当前激活的标签：标签 -> 以该标签激活的密钥类型
+        active_by_label = {}
+        for key_type, active_label in active_keys.items():
+            active_by_label.setdefault(active_label, set()).add(key_type)
         
-        # 按标签排序显示
-        def sort_key(label):
+        # 按标签排序显示：激活的标签优先，其次 default，其余按名称
+        ordered = []
+        for label in keys_by_label:
             label_lower = label.lower()
-            if label_lower in active_labels:
+            if label_lower in active_by_label:
                 priority = 0
             elif label_lower == 'default':
                 priority = 1
             else:
                 priority = 2
-            return (priority, label_lower)
+            ordered.append((priority, label_lower, label))
+        ordered.sort()
+        
+        for _, label_lower, label in ordered:
+            self._format_key_info(out, label, keys_by_label[label], 
+                                  active_by_label.get(label_lower, set()), show_content)
         
-        for label in sorted(keys_by_label.keys(), key=sort_key):
-            self._print_key_info(label, keys_by_label[label], 
-                               active_keys, show_content)
+        out.append(format_separator())
+        out.append("💡 提示: 使用 'switch <label>' 切换默认密钥")
+        out.append(format_separator())
         
-        print_separator()
-        print("💡 提示: 使用 'switch <label>' 切换默认密钥")
-        print_separator()
+        # 整个列表一次写出
+        sys.stdout.write("\n".join(out) + "\n")
     
     def list_backups(self):
         """列出所有备份"""
-        print_section_header("备份列表")
+        out = [format_section_header("备份列表")]
         
-        backups = sorted(self.backup_dir.glob('backup_*'), 
-                        key=lambda x: x.stat().st_mtime, reverse=True)
+        # 每个备份目录只 stat 一次，按修改时间倒序
+        with os.scandir(self.backup_dir) as it:
+            backups = [(entry.stat().st_mtime, entry.name, entry.path)
+                       for entry in it
+                       if entry.name.startswith('backup_') and entry.is_dir()]
+        backups.sort(reverse=True)
         
         if not backups:
-            print("📭 暂无备份")
-            return
+            out.append("📭 暂无备份")
+        
+        for i, (mtime, name, path) in enumerate(backups, 1):
+            with os.scandir(path) as it:
+                file_count = sum(1 for entry in it if entry.name.startswith('id_'))
+            out.append(f"\n[{i}] {name}")
+            out.append(f"    时间: {format_timestamp(mtime)}")
+            out.append(f"    文件数: {file_count}")
+            out.append(f"    路径: {path}")
         
-        for i, backup in enumerate(backups, 1):
-            mtime = datetime.fromtimestamp(backup.stat().st_mtime)
-            files = list(backup.glob('id_*'))
-            print(f"\n[{i}] {backup.name}")
-            print(f"    时间: {format_timestamp(mtime)}")
-            print(f"    文件数: {len(files)}")
-            print(f"    路径: {backup}")
+        sys.stdout.write("\n".join(out) + "\n")
     
     def _scan_all_keys(self) -> Dict[str, List[Dict]]:
         """扫描所有密钥文件"""
         keys_by_label = {}
-        key_pattern = get_key_pattern()
-        
-        for file in self.ssh_dir.glob('id_*'):
-            if not file.is_file() or file.name.endswith('.pub'):
+        # 循环内用到的方法先绑定为局部变量
+        match_key = get_key_pattern().match
+        
+        # 一次目录遍历：DirEntry 自带类型信息，stat 结果会被缓存
+        dir_mtime = os.stat(self.ssh_dir).st_mtime_ns
+        with os.scandir(self.ssh_dir) as it:
+            entries = list(it)
+        names = {entry.name for entry in entries}
+        # 顺带刷新文件名快照，供后续类型检测复用
+        self._dir_names_cache = frozenset(names)
+        self._dir_names_mtime = dir_mtime
+        
+        for entry in entries:
+            if not entry.name.startswith('id_') or entry.name.endswith('.pub'):
+                continue
+            if not entry.is_file():
                 continue
             
-            match = key_pattern.match(file.name)
+            match = match_key(entry.name)
             if not match:
                 continue
             
             key_type = match.group(1)
             label = match.group(2)[1:] if match.group(2) else 'default'
             
-            pub_file = self.ssh_dir / f"{file.name}.pub"
+            # 路径保存为字符串，不为每个文件构造 Path 对象
+            st = entry.stat()
+            pub_name = f"{entry.name}.pub"
             key_info = {
                 'type': key_type,
-                'private': file,
-                'public': pub_file,
-                'has_pub': pub_file.exists(),
-                'size': file.stat().st_size,
-                'mtime': datetime.fromtimestamp(file.stat().st_mtime)
+                'name': entry.name,
+                'private': entry.path,
+                'public': f"{entry.path}.pub",
+                'has_pub': pub_name in names,
+                'size': st.st_size,
+                'mtime': st.st_mtime
             }
-            
-            if label not in keys_by_label:
-                keys_by_label[label] = []
-            keys_by_label[label].append(key_info)
+            keys_by_label.setdefault(label, []).append(key_info)
         
         return keys_by_label
     
-    def _print_key_info(self, label: str, keys: List[Dict], 
-                       active_keys: Dict, show_content: bool):
-        """打印单个密钥信息"""
-        is_active = any(active_keys.get(k['type']) == label.lower() 
-                       for k in keys)
+    def _format_key_info(self, out: List[str], label: str, keys: List[Dict], 
+                         active_types: Set[str], show_content: bool):
+        """将单个密钥信息追加到输出缓冲 out（active_types 为以该标签激活的密钥类型）"""
+        is_active = any(k['type'] in active_types for k in keys)
         
         if is_active:
             icon = "✨"
@@ -161,28 +378,28 @@ class SSHKeyManager:
             icon = "🏷️"
             status_text = ""
         
-        print(f"\n{icon} {status_text} {label.upper()}")
-        print("-" * 70)
+        out.append(f"\n{icon} {status_text} {label.upper()}")
+        out.append("-" * 70)
         
         for key in keys:
-            print(f"  类型: {key['type']}")
-            print(f"  私钥: {key['private'].name}")
-            print(f"  公钥: {'✅' if key['has_pub'] else '❌'} {key['private'].name}.pub")
-            print(f"  大小: {format_size(key['size'])}")
-            print(f"  修改: {format_timestamp(key['mtime'])}")
-            
-            hostname = self._get_hostname_for_label(label)
-            host_alias = f"{hostname.split('.')[0]}-{label}"
-            print(f"  别名: git@{host_alias}:user/repo.git")
-            
-            if active_keys.get(key['type']) == label.lower():
-                print(f"  状态: ⭐ 正在使用（当前默认 {key['type']} 密钥）")
+            out.append(f"  类型: {key['type']}")
+            out.append(f"  私钥: {key['name']}")
+            out.append(f"  公钥: {'✅' if key['has_pub'] else '❌'} {key['name']}.pub")
+            out.append(f"  大小: {format_size(key['size'])}")
+            out.append(f"  修改: {format_timestamp(key['mtime'])}")
+            
+            host_alias, _ = _label_host(label)
+            out.append(f"  别名: git@{host_alias}:user/repo.git")
+            
+            if key['type'] in active_types:
+                out.append(f"  状态: ⭐ 正在使用（当前默认 {key['type']} 密钥）")
             else:
-                print(f"  状态: 💤 未使用")
+                out.append(f"  状态: 💤 未使用")
             
             if show_content and key['has_pub']:
-                pub_content = key['public'].read_text(encoding='utf-8').strip()
-                print(f"\n  📋 公钥内容:\n  {pub_content}\n")
+                with open(key['public'], 'rb') as f:
+                    pub_content = f.read().decode('utf-8').strip()
+                out.append(f"\n  📋 公钥内容:\n  {pub_content}\n")
     
     # ------------------------------------------------------------------------
     # 备份操作
@@ -190,24 +407,29 @@ class SSHKeyManager:
     
     def backup_keys(self, silent: bool = False):
         """备份所有密钥"""
+        with os.scandir(self.ssh_dir) as it:
+            names = [entry.name for entry in it
+                     if entry.name.startswith('id_') and entry.is_file()]
+        
+        backup_path = self._backup_files(names)
+        
+        if not silent:
+            print(f"✅ 备份完成: {backup_path}")
+            print(f"📦 已备份 {len(names)} 个文件")
+        
+        return backup_path
+    
+    def _backup_files(self, names: List[str]) -> Path:
+        """将 SSH 目录下的指定文件连同状态文件备份到新的 backup_<时间戳> 目录"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_path = self.backup_dir / f"backup_{timestamp}"
         backup_path.mkdir(mode=0o700, exist_ok=True)
         
-        key_files = list(self.ssh_dir.glob('id_*'))
-        backed_up = []
-        
-        for key_file in key_files:
-            if key_file.is_file():
-                shutil.copy2(key_file, backup_path / key_file.name)
-                backed_up.append(key_file.name)
+        for name in names:
+            _clone_or_copy(self.ssh_dir / name, backup_path / name)
         
         if self.state_file.exists():
-            shutil.copy2(self.state_file, backup_path / STATE_FILE_NAME)
-        
-        if not silent:
-            print(f"✅ 备份完成: {backup_path}")
-            print(f"📦 已备份 {len(backed_up)} 个文件")
+            _clone_or_copy(self.state_file, backup_path / STATE_FILE_NAME)
         
         return backup_path
     
@@ -218,19 +440,75 @@ class SSHKeyManager:
     def add_key(self, label: str, email: str, 
                 key_type: str = DEFAULT_KEY_TYPE, host: Optional[str] = None):
         """创建新密钥"""
+        key_file = self._prepare_new_key(label, key_type)
+        if key_file is None:
+            return
+        
+        print(f"🔨 创建新密钥: {label} ({key_type})")
+        print(f"📧 邮箱: {email}")
+        
+        try:
+            self._run_keygen(key_type, email, key_file)
+            self._finish_new_key(label, key_file, host)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ 创建失败: {_keygen_error(e)}")
+        except Exception as e:
+            print(f"❌ 错误: {e}")
+    
+    def add_keys_bulk(self, specs: List[Tuple]):
+        """批量创建密钥，各 ssh-keygen 进程并行执行
+        
+        Args:
+            specs: (label, email[, key_type[, host]]) 元组列表
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            for label, email, *rest in specs:
+                key_type = rest[0] if rest else DEFAULT_KEY_TYPE
+                host = rest[1] if len(rest) > 1 else None
+                
+                key_file = self._prepare_new_key(label, key_type)
+                if key_file is None:
+                    continue
+                if any(pending == key_file for pending, _ in jobs.values()):
+                    print(f"❌ 重复的密钥: {key_file.name}")
+                    continue
+                
+                print(f"🔨 创建新密钥: {label} ({key_type}) - {email}")
+                future = executor.submit(self._run_keygen, key_type, email, key_file)
+                jobs[future] = (key_file, (label, host))
+            
+            # 生成完成后在主线程内依次更新 config 与输出，config 最后统一写入一次
+            with self.config_manager:
+                for future in as_completed(jobs):
+                    key_file, (label, host) = jobs[future]
+                    try:
+                        future.result()
+                        self._finish_new_key(label, key_file, host)
+                    except subprocess.CalledProcessError as e:
+                        print(f"❌ 创建失败 ({label}): {_keygen_error(e)}")
+                    except Exception as e:
+                        print(f"❌ 错误 ({label}): {e}")
+    
+    def _prepare_new_key(self, label: str, key_type: str) -> Optional[Path]:
+        """校验密钥类型与目标文件，返回待创建的私钥路径；不可创建时返回 None"""
         if key_type not in SUPPORTED_KEY_TYPES:
             print(f"❌ 不支持的密钥类型: {key_type}")
             print(f"   支持的类型: {', '.join(SUPPORTED_KEY_TYPES)}")
-            return
+            return None
         
         key_file = self.ssh_dir / f"id_{key_type}.{label}"
         if key_file.exists():
             print(f"❌ 密钥已存在: {key_file.name}")
-            return
-        
-        print(f"🔨 创建新密钥: {label} ({key_type})")
-        print(f"📧 邮箱: {email}")
+            return None
         
+        return key_file
+    
+    @staticmethod
+    def _run_keygen(key_type: str, email: str, key_file: Path):
+        """调用 ssh-keygen 生成密钥对（可在工作线程中执行）"""
         cmd = [
             'ssh-keygen',
             '-t', key_type,
@@ -238,25 +516,26 @@ class SSHKeyManager:
             '-f', str(key_file),
             '-N', ''
         ]
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            print(f"✅ 密钥创建成功: {key_file.name}")
-            
-            if host:
-                self.config_manager.update_host(label, host, key_file)
-                print(f"✅ SSH config 已更新: Host {label} -> {host}")
-            
-            pub_file = Path(str(key_file) + '.pub')
-            if pub_file.exists():
-                pub_key = pub_file.read_text(encoding='utf-8').strip()
-                print(f"\n📋 公钥内容:\n{pub_key}\n")
-                print("💡 请将公钥添加到 Git 平台（GitHub/GitLab 等）")
-        
-        except subprocess.CalledProcessError as e:
-            print(f"❌ 创建失败: {e}")
-        except Exception as e:
-            print(f"❌ 错误: {e}")
+        # stdin 置空：目标文件意外存在时 ssh-keygen 直接失败而不是等待确认；
+        # stdout 只有指纹与 randomart，直接丢弃，仅保留 stderr 用于出错提示
+        subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    
+    def _finish_new_key(self, label: str, key_file: Path, host: Optional[str]):
+        """密钥生成后的收尾：刷新缓存、更新 SSH config、展示公钥"""
+        self._invalidate_dir_cache()
+        print(f"✅ 密钥创建成功: {key_file.name}")
+        
+        if host:
+            self.config_manager.update_host(label, host, key_file)
+            print(f"✅ SSH config 已更新: Host {label} -> {host}")
+        
+        pub_file = _pub_path(key_file)
+        if pub_file.exists():
+            with open(pub_file, 'rb') as f:
+                pub_key = f.read().decode('utf-8').strip()
+            print(f"\n📋 公钥内容:\n{pub_key}\n")
+            print("💡 请将公钥添加到 Git 平台（GitHub/GitLab 等）")
     
     def remove_key(self, label: str, key_type: Optional[str] = None):
         """删除密钥"""
@@ -272,56 +551,54 @@ class SSHKeyManager:
                 print("❌ 操作已取消")
                 return
         
-        removed_files = []
-        
+        # 第一步：收集待删除的文件
         if label_lower == 'default':
             if key_type:
-                patterns = [f"id_{key_type}", f"id_{key_type}.pub"]
+                names = {f"id_{key_type}", f"id_{key_type}.pub"}
             else:
-                patterns = ["id_ed25519", "id_ed25519.pub", 
-                          "id_rsa", "id_rsa.pub",
-                          "id_ecdsa", "id_ecdsa.pub",
-                          "id_dsa", "id_dsa.pub"]
-            
-            for pattern in patterns:
-                file = self.ssh_dir / pattern
-                if file.exists() and file.is_file():
-                    if not removed_files:
-                        backup_path = self.backup_keys(silent=True)
-                        print(f"💾 已自动备份到: {backup_path}")
-                    
-                    file.unlink()
-                    removed_files.append(file.name)
+                names = _DEFAULT_KEY_NAMES
+            
+            # 一次 scandir 在内存中过滤，代替逐个文件 exists()/is_file()
+            with os.scandir(self.ssh_dir) as it:
+                matched = sorted(entry.name for entry in it
+                                 if entry.name in names and entry.is_file())
         else:
             if key_type:
-                patterns = [f"id_{key_type}.{label}", f"id_{key_type}.{label}.pub"]
+                wanted = {_fs_fold(f"id_{key_type}.{label}"),
+                          _fs_fold(f"id_{key_type}.{label}.pub")}
+                candidates = (name for name in self._dir_names()
+                              if _fs_fold(name) in wanted)
             else:
-                patterns = [f"id_*.{label}", f"id_*.{label}.pub"]
-            
-            for pattern in patterns:
-                for file in self.ssh_dir.glob(pattern):
-                    if file.is_file():
-                        if not removed_files:
-                            backup_path = self.backup_keys(silent=True)
-                            print(f"💾 已自动备份到: {backup_path}")
-                        
-                        file.unlink()
-                        removed_files.append(file.name)
+                suffixes = (_fs_fold(f".{label}"), _fs_fold(f".{label}.pub"))
+                candidates = (name for name in self._dir_names()
+                              if name.startswith('id_') and _fs_fold(name).endswith(suffixes))
+            matched = sorted(name for name in candidates
+                             if os.path.isfile(self.ssh_dir / name))
         
-        if removed_files:
-            print(f"✅ 已删除 {len(removed_files)} 个文件:")
-            for f in removed_files:
-                print(f"   - {f}")
-            
-            self._remove_ssh_config_alias(label)
-            
-            key_type = self._detect_key_type_for_label(label)
-            if key_type:
-                active_keys = self.state_manager.read_active_keys()
-                if active_keys.get(key_type) == label_lower:
-                    self.state_manager.remove_active_key(key_type)
-        else:
+        if not matched:
             print(f"⚠️  未找到密钥: {label}")
+            return
+        
+        # 第二步：只备份将要删除的文件，再逐个删除
+        backup_path = self._backup_files(matched)
+        print(f"💾 已自动备份到: {backup_path}")
+        
+        for name in matched:
+            os.unlink(self.ssh_dir / name)
+        self._invalidate_dir_cache()
+        
+        print(f"✅ 已删除 {len(matched)} 个文件:")
+        for name in matched:
+            print(f"   - {name}")
+        
+        self._remove_ssh_config_alias(label)
+        
+        # 密钥类型取自已删除的文件名（文件已不在，无法再检测）
+        removed_types = {name[3:].split('.', 1)[0] for name in matched}
+        with self.state_manager.batch() as state:
+            for removed_type in removed_types:
+                if state.get(removed_type) == label_lower:
+                    del state[removed_type]
     
     # ------------------------------------------------------------------------
     # 密钥切换
@@ -329,8 +606,6 @@ class SSHKeyManager:
     
     def switch_key(self, label: str, key_type: Optional[str] = None):
         """切换默认密钥"""
-        label_lower = label.lower()
-        
         if not key_type:
             key_type = self._detect_key_type_for_label(label)
             if not key_type:
@@ -340,6 +615,8 @@ class SSHKeyManager:
         
         source_file = self.ssh_dir / f"id_{key_type}.{label}"
         target_file = self.ssh_dir / f"id_{key_type}"
+        target_pub = _pub_path(target_file)
+        source_pub = _pub_path(source_file)
         
         if not source_file.exists():
             print(f"❌ 密钥不存在: {source_file.name}")
@@ -351,19 +628,21 @@ class SSHKeyManager:
             
             original_backup = self.ssh_dir / f"id_{key_type}.original"
             if not original_backup.exists():
-                shutil.copy2(target_file, original_backup)
-                shutil.copy2(f"{target_file}.pub", f"{original_backup}.pub")
+                _clone_or_copy(target_file, original_backup)
+                _clone_or_copy(target_pub, _pub_path(original_backup))
                 print(f"💾 原始密钥已备份为: {original_backup.name}")
             
             if current_label != 'original':
                 backup_file = self.ssh_dir / f"id_{key_type}.{current_label}"
                 if not backup_file.exists():
-                    shutil.copy2(target_file, backup_file)
-                    shutil.copy2(f"{target_file}.pub", f"{backup_file}.pub")
+                    _clone_or_copy(target_file, backup_file)
+                    _clone_or_copy(target_pub, _pub_path(backup_file))
         
-        shutil.copy2(source_file, target_file)
-        shutil.copy2(f"{source_file}.pub", f"{target_file}.pub")
+        # 原子替换默认密钥：上面的备份是独立副本，不受影响
+        _replace_with_copy(source_file, target_file)
+        _replace_with_copy(source_pub, target_pub)
         
+        self._invalidate_dir_cache()
         self.state_manager.write_active_key(key_type, label)
         
         self._update_ssh_config_alias(label, source_file)
@@ -381,6 +660,7 @@ class SSHKeyManager:
         
         source_file = self.ssh_dir / f"id_{key_type}"
         target_file = self.ssh_dir / f"id_{key_type}.{new_label}"
+        target_pub = _pub_path(target_file)
         
         if not source_file.exists():
             print(f"❌ 默认密钥不存在: {source_file.name}")
@@ -391,8 +671,10 @@ class SSHKeyManager:
             if not prompt_confirm("是否覆盖？"):
                 return
         
-        shutil.copy2(source_file, target_file)
-        shutil.copy2(f"{source_file}.pub", f"{target_file}.pub")
+        # 覆盖已有标签时原子替换，中途失败不会留下半截的密钥文件
+        _replace_with_copy(source_file, target_file)
+        _replace_with_copy(_pub_path(source_file), target_pub)
+        self._invalidate_dir_cache()
         
         print(f"✅ 已添加标签: {new_label} ({key_type})")
         
@@ -402,10 +684,7 @@ class SSHKeyManager:
     def rename_tag(self, old_label: str, new_label: str, 
                    key_type: str = DEFAULT_KEY_TYPE):
         """重命名密钥标签"""
-        old_label_lower = old_label.lower()
-        new_label_lower = new_label.lower()
-        
-        if old_label_lower == 'default':
+        if old_label.lower() == 'default':
             print("❌ 不能重命名 default 标签")
             return
         
@@ -425,7 +704,8 @@ class SSHKeyManager:
             return
         
         old_file.rename(new_file)
-        Path(f"{old_file}.pub").rename(Path(f"{new_file}.pub"))
+        _pub_path(old_file).rename(_pub_path(new_file))
+        self._invalidate_dir_cache()
         
         self._rename_ssh_config_alias(old_label, new_label, new_file)
         
@@ -456,13 +736,7 @@ class SSHKeyManager:
         print(f"📂 仓库路径: {repo_path}\n")
         
         try:
-            result = subprocess.run(
-                ['git', '-C', str(repo_path), 'remote', 'get-url', 'origin'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            current_url = result.stdout.strip()
+            current_url = self._get_origin_url(repo_path)
             print(f"🔗 当前 Remote URL:\n   {current_url}\n")
             
             parsed = self._parse_git_url(current_url)
@@ -476,8 +750,7 @@ class SSHKeyManager:
             print(f"   用户/组织: {user}")
             print(f"   仓库: {repo}\n")
             
-            hostname = self._get_hostname_for_label(label)
-            host_alias = f"{hostname.split('.')[0]}-{label}"
+            host_alias, _ = _label_host(label)
             new_url = f"git@{host_alias}:{user}/{repo}.git"
             
             print(f"🔧 新的 Remote URL:")
@@ -495,23 +768,15 @@ class SSHKeyManager:
             print("✅ Remote URL 已更新\n")
             
             print("🧪 测试 SSH 连接...")
-            test_result = subprocess.run(
-                ['ssh', '-T', f'git@{host_alias}'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            output = test_result.stderr + test_result.stdout
-            if 'successfully authenticated' in output.lower() or \
-               'you\'ve successfully authenticated' in output.lower():
+            _, output = _ssh_probe(host_alias)
+            if b'successfully authenticated' in output.lower():
                 print("✅ SSH 连接测试成功！")
-                for line in output.split('\n'):
-                    if 'Hi' in line or 'Welcome' in line:
-                        print(f"   {line.strip()}")
+                for line in output.splitlines():
+                    if b'Hi' in line or b'Welcome' in line:
+                        print(f"   {line.strip().decode('utf-8', 'replace')}")
             else:
                 print("⚠️  SSH 连接测试:")
-                print(f"   {output.strip()}")
+                print(f"   {output.strip().decode('utf-8', 'replace')}")
             
             print("\n" + "=" * 70)
             print("✅ 配置完成！现在可以使用以下命令:")
@@ -532,87 +797,75 @@ class SSHKeyManager:
     
     def show_repo_info(self, repo_path: str = '.'):
         """显示当前 Git 仓库的 SSH 配置信息"""
-        print_section_header("Git 仓库配置信息")
-        
+        out = [format_section_header("Git 仓库配置信息")]
+        try:
+            self._format_repo_info(out, repo_path)
+        finally:
+            # 无论中途从哪个分支返回，都一次性写出已收集的内容
+            sys.stdout.write("\n".join(out) + "\n")
+    
+    def _format_repo_info(self, out: List[str], repo_path: str):
+        """将仓库配置信息追加到输出缓冲 out"""
         repo_path = Path(repo_path).resolve()
         
         if not (repo_path / '.git').exists():
-            print(f"❌ 不是有效的 Git 仓库: {repo_path}")
+            out.append(f"❌ 不是有效的 Git 仓库: {repo_path}")
             return
         
-        print(f"📂 仓库路径: {repo_path}")
+        out.append(f"📂 仓库路径: {repo_path}")
         
         try:
-            result = subprocess.run(
-                ['git', 'remote', 'get-url', 'origin'],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            remote_url = result.stdout.strip()
-            print(f"🔗 Remote URL: {remote_url}")
+            remote_url = self._get_origin_url(repo_path)
+            out.append(f"🔗 Remote URL: {remote_url}")
             
             parsed = self._parse_git_url(remote_url)
             if parsed:
                 platform, user, repo = parsed
-                print(f"\n📊 解析信息:")
-                print(f"  ├─ 平台: {platform}")
-                print(f"  ├─ 用户/组织: {user}")
-                print(f"  └─ 仓库: {repo}")
+                out.append(f"\n📊 解析信息:")
+                out.append(f"  ├─ 平台: {platform}")
+                out.append(f"  ├─ 用户/组织: {user}")
+                out.append(f"  └─ 仓库: {repo}")
                 
-                ssh_pattern = r'git@([^:]+):'
-                match = re.match(ssh_pattern, remote_url)
+                match = _SSH_HOST_RE.match(remote_url)
                 if match:
                     host_alias = match.group(1)
                     if '-' in host_alias:
-                        label = host_alias.split('-', 1)[1]
-                        print(f"\n🔑 当前使用别名: {host_alias}")
+                        label = host_alias.partition('-')[2]
+                        out.append(f"\n🔑 当前使用别名: {host_alias}")
                         
                         key_type = self._detect_key_type_for_label(label)
                         if key_type:
                             key_file = self.ssh_dir / f"id_{key_type}.{label}"
                             pub_file = self.ssh_dir / f"id_{key_type}.{label}.pub"
                             
-                            print(f"\n🗝️  密钥信息:")
-                            print(f"  ├─ 标签: {label}")
-                            print(f"  ├─ 类型: {key_type}")
-                            print(f"  ├─ 私钥: {key_file}")
-                            print(f"  └─ 公钥: {pub_file}")
+                            out.append(f"\n🗝️  密钥信息:")
+                            out.append(f"  ├─ 标签: {label}")
+                            out.append(f"  ├─ 类型: {key_type}")
+                            out.append(f"  ├─ 私钥: {key_file}")
+                            out.append(f"  └─ 公钥: {pub_file}")
                             
-                            ssh_config = self.config_manager.config_file
-                            if ssh_config.exists():
-                                with open(ssh_config, 'r', encoding='utf-8') as f:
-                                    content = f.read()
-                                    if f"Host {host_alias}" in content:
-                                        print(f"\n📝 SSH Config:")
-                                        lines = content.split('\n')
-                                        in_host = False
-                                        for line in lines:
-                                            if f"Host {host_alias}" in line:
-                                                in_host = True
-                                            if in_host:
-                                                print(f"  {line}")
-                                                if line.strip() and not line.startswith(' ') and not line.startswith('\t') and not f"Host {host_alias}" in line:
-                                                    break
+                            host_block = self.config_manager.get_host_block(host_alias)
+                            if host_block:
+                                out.append(f"\n📝 SSH Config:")
+                                out.extend(f"  {line}" for line in host_block.split('\n'))
                         else:
-                            print(f"\n⚠️  未找到标签 '{label}' 对应的密钥文件")
+                            out.append(f"\n⚠️  未找到标签 '{label}' 对应的密钥文件")
                     else:
-                        print(f"\n💡 提示: 当前使用标准 SSH URL，未配置 SSH config 别名")
-                        print(f"   可以使用 'sshm use <标签>' 配置密钥")
+                        out.append(f"\n💡 提示: 当前使用标准 SSH URL，未配置 SSH config 别名")
+                        out.append(f"   可以使用 'sshm use <标签>' 配置密钥")
                 else:
-                    print(f"\n💡 提示: 使用的是 HTTPS URL")
-                    print(f"   可以使用 'sshm use <标签>' 转换为 SSH 并配置密钥")
+                    out.append(f"\n💡 提示: 使用的是 HTTPS URL")
+                    out.append(f"   可以使用 'sshm use <标签>' 转换为 SSH 并配置密钥")
             else:
-                print("\n⚠️  无法解析 remote URL")
+                out.append("\n⚠️  无法解析 remote URL")
                 
         except subprocess.CalledProcessError as e:
             if 'No such remote' in str(e.stderr):
-                print("\n⚠️  未配置 origin remote")
+                out.append("\n⚠️  未配置 origin remote")
             else:
-                print(f"\n❌ Git 命令执行失败: {e}")
+                out.append(f"\n❌ Git 命令执行失败: {e}")
         except Exception as e:
-            print(f"\n❌ 错误: {e}")
+            out.append(f"\n❌ 错误: {e}")
     
     def test_connection(self, label: Optional[str] = None, test_all: bool = False, 
                        repo_path: str = '.'):
@@ -625,14 +878,20 @@ class SSHKeyManager:
                 print("❌ 未找到任何密钥")
                 return
             
-            results = []
+            targets = []
             for label, key_infos in keys_by_label.items():
-                platform = self._get_hostname_for_label(label).split('.')[0]
-                host_alias = f"{platform}-{label}"
-                
-                result = self._test_ssh_connection(host_alias)
+                host_alias, _ = _label_host(label)
                 key_types = ', '.join([k['type'] for k in key_infos])
-                results.append((label, host_alias, key_types, result))
+                targets.append((label, host_alias, key_types))
+            
+            # 各连接测试互不依赖，并发执行（耗时主要在网络握手）
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(16, len(targets))) as executor:
+                outcomes = list(executor.map(
+                    lambda target: self._test_ssh_connection(target[1]), targets))
+            
+            results = [target + (outcome,)
+                       for target, outcome in zip(targets, outcomes)]
             
             print("\n" + "=" * 70)
             print("测试结果汇总:")
@@ -652,8 +911,7 @@ class SSHKeyManager:
                 print(f"\n💡 使用 'sshm list' 查看所有可用密钥")
                 return
             
-            platform = self._get_hostname_for_label(label).split('.')[0]
-            host_alias = f"{platform}-{label}"
+            host_alias, _ = _label_host(label)
             
             print(f"🔑 密钥: {label}")
             print(f"🌐 主机: {host_alias}")
@@ -677,18 +935,10 @@ class SSHKeyManager:
             print(f"📂 仓库路径: {repo_path}")
             
             try:
-                result = subprocess.run(
-                    ['git', 'remote', 'get-url', 'origin'],
-                    cwd=repo_path,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                remote_url = result.stdout.strip()
+                remote_url = self._get_origin_url(repo_path)
                 print(f"🔗 Remote URL: {remote_url}")
                 
-                ssh_pattern = r'git@([^:]+):'
-                match = re.match(ssh_pattern, remote_url)
+                match = _SSH_HOST_RE.match(remote_url)
                 if match:
                     host_alias = match.group(1)
                     print(f"\n🧪 正在测试 {host_alias}...")
@@ -715,25 +965,21 @@ class SSHKeyManager:
     def _test_ssh_connection(self, host: str) -> Tuple[bool, str]:
         """测试 SSH 连接"""
         try:
-            result = subprocess.run(
-                ['ssh', '-T', f'git@{host}'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            output = result.stdout + result.stderr
+            # 输出只做子串匹配，保留 bytes，仅对需要展示的片段解码
+            returncode, output = _ssh_probe(host)
+            lowered = output.lower()
             
-            if 'successfully authenticated' in output.lower():
-                match = re.search(r'Hi ([^!]+)!', output)
-                username = match.group(1) if match else 'User'
+            if b'successfully authenticated' in lowered:
+                match = _GREETING_USER_RE.search(output)
+                username = match.group(1).decode('utf-8', 'replace') if match else 'User'
                 return (True, f"认证成功! (Hi {username}!)")
-            elif 'welcome to' in output.lower():
+            elif b'welcome to' in lowered:
                 return (True, "连接成功!")
-            elif result.returncode == 1 and 'permission denied' not in output.lower():
+            elif returncode == 1 and b'permission denied' not in lowered:
                 return (True, "连接成功!")
             else:
-                return (False, f"连接失败: {output.strip()[:100]}")
+                detail = output.strip()[:100].decode('utf-8', 'replace')
+                return (False, f"连接失败: {detail}")
                 
         except subprocess.TimeoutExpired:
             return (False, "连接超时")
@@ -744,21 +990,18 @@ class SSHKeyManager:
     
     def _parse_git_url(self, url: str) -> Optional[Tuple[str, str, str]]:
         """解析 Git URL"""
-        ssh_pattern = r'git@([^:]+):([^/]+)/(.+?)(?:\.git)?$'
-        match = re.match(ssh_pattern, url)
+        match = _SSH_URL_RE.match(url)
         if match:
             hostname, user, repo = match.groups()
-            if '-' in hostname:
-                platform = hostname.split('-')[0]
-            else:
-                platform = hostname.split('.')[0]
+            # 别名 github-work 取 '-' 前部分，真实主机名 github.com 取 '.' 前部分
+            sep = '-' if '-' in hostname else '.'
+            platform = hostname.partition(sep)[0]
             return (platform, user, repo)
         
-        https_pattern = r'https?://([^/]+)/([^/]+)/(.+?)(?:\.git)?$'
-        match = re.match(https_pattern, url)
+        match = _HTTPS_URL_RE.match(url)
         if match:
             hostname, user, repo = match.groups()
-            platform = hostname.split('.')[0]
+            platform = hostname.partition('.')[0]
             return (platform, user, repo)
         
         return None
@@ -767,41 +1010,60 @@ class SSHKeyManager:
     # 辅助方法
     # ------------------------------------------------------------------------
     
+    def _dir_names(self) -> FrozenSet[str]:
+        """获取 SSH 目录的文件名快照（目录 mtime 未变化时只需一次 stat，不再 listdir）"""
+        dir_mtime = os.stat(self.ssh_dir).st_mtime_ns
+        if self._dir_names_cache is None or dir_mtime != self._dir_names_mtime:
+            self._dir_names_cache = frozenset(os.listdir(self.ssh_dir))
+            self._dir_names_mtime = dir_mtime
+        return self._dir_names_cache
+    
+    def _invalidate_dir_cache(self):
+        """密钥文件发生变化后使文件名快照失效（不依赖 mtime 精度）"""
+        self._dir_names_cache = None
+        self._dir_names_mtime = None
+    
+    @staticmethod
+    def _get_origin_url(repo_path: Path) -> str:
+        """获取仓库 origin 的 URL：优先直接读取 .git/config，否则调用 git
+        
+        Raises:
+            subprocess.CalledProcessError: git 命令执行失败（如未配置 origin）
+        """
+        url = _read_origin_url(repo_path)
+        if url is not None:
+            return url
+        
+        result = subprocess.run(
+            ['git', '-C', str(repo_path), 'remote', 'get-url', 'origin'],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return result.stdout.strip()
+    
+    def _dir_names_folded(self) -> FrozenSet[str]:
+        """按文件系统大小写规则折叠后的文件名快照（区分大小写的系统上即原快照）"""
+        names = self._dir_names()
+        if _CASE_INSENSITIVE_FS:
+            return frozenset(map(_fs_fold, names))
+        return names
+    
     def _detect_key_type_for_label(self, label: str) -> Optional[str]:
         """检测指定标签的密钥类型"""
-        for key_type in SUPPORTED_KEY_TYPES:
-            key_file = self.ssh_dir / f"id_{key_type}.{label}"
-            if key_file.exists():
-                return key_type
-        return None
+        names = self._dir_names_folded()
+        return next((t for t in SUPPORTED_KEY_TYPES
+                     if _fs_fold(f"id_{t}.{label}") in names), None)
     
     def _detect_default_key_type(self) -> Optional[str]:
         """检测默认密钥类型"""
-        for key_type in SUPPORTED_KEY_TYPES:
-            key_file = self.ssh_dir / f"id_{key_type}"
-            if key_file.exists():
-                return key_type
-        return None
-    
-    def _get_hostname_for_label(self, label: str) -> str:
-        """根据标签推断主机名"""
-        hostname_map = {
-            'github': 'github.com',
-            'gitlab': 'gitlab.com',
-            'gitee': 'gitee.com',
-            'bitbucket': 'bitbucket.org',
-        }
-        
-        label_lower = label.lower()
-        for key, host in hostname_map.items():
-            if key in label_lower:
-                return host
-        return 'github.com'
+        names = self._dir_names()
+        return next((t for t in SUPPORTED_KEY_TYPES
+                     if f"id_{t}" in names), None)
     
     def _update_ssh_config_alias(self, label: str, key_file: Path):
         """自动更新 SSH config 别名配置"""
-        hostname = self._get_hostname_for_label(label)
-        host_alias = f"{hostname.split('.')[0]}-{label}"
+        host_alias, hostname = _label_host(label)
         
         self.config_manager.update_host(host_alias, hostname, key_file.resolve())
         print(f"📝 SSH 配置别名: {host_alias} → {hostname}")
@@ -809,20 +1071,19 @@ class SSHKeyManager:
     
     def _remove_ssh_config_alias(self, label: str):
         """删除 SSH config 别名配置"""
-        hostname = self._get_hostname_for_label(label)
-        host_alias = f"{hostname.split('.')[0]}-{label}"
+        host_alias, _ = _label_host(label)
         
         self.config_manager.remove_host(host_alias)
         print(f"🗑️  已删除 SSH 配置别名: {host_alias}")
     
     def _rename_ssh_config_alias(self, old_label: str, new_label: str, new_key_file: Path):
         """重命名 SSH config 别名配置"""
-        old_hostname = self._get_hostname_for_label(old_label)
-        old_alias = f"{old_hostname.split('.')[0]}-{old_label}"
-        self.config_manager.remove_host(old_alias)
+        old_alias, _ = _label_host(old_label)
+        new_alias, new_hostname = _label_host(new_label)
         
-        new_hostname = self._get_hostname_for_label(new_label)
-        new_alias = f"{new_hostname.split('.')[0]}-{new_label}"
-        self.config_manager.update_host(new_alias, new_hostname, new_key_file.resolve())
+        # 删除与添加合并为一次写入
+        with self.config_manager:
+            self.config_manager.remove_host(old_alias)
+            self.config_manager.update_host(new_alias, new_hostname, new_key_file.resolve())
         
         print(f"📝 SSH 配置别名已更新: {old_alias} → {new_alias}")
@@ -4,9 +4,13 @@
 状态管理器 - 负责密钥状态的持久化
 """
 
-import json
+import os
+import stat
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..utils.jsonio import dumps, loads
 
 
 class StateManager:
@@ -14,43 +18,93 @@ class StateManager:
     
     def __init__(self, state_file: Path):
         self.state_file = state_file
+        # 已解析的状态及对应文件的 (st_mtime_ns, st_size)，文件未变化时跳过重新解析
+        self._cache: Optional[Dict[str, str]] = None
+        self._cache_stamp: Optional[Tuple[int, int]] = None
     
     def read_active_keys(self) -> Dict[str, str]:
         """读取当前激活的密钥状态"""
-        if not self.state_file.exists():
+        try:
+            st = self.state_file.stat()
+        except OSError:
             return {}
         
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._cache is not None and stamp == self._cache_stamp:
+            return self._cache.copy()
+        
         try:
-            data = json.loads(self.state_file.read_text(encoding='utf-8'))
-            # 确保标签为小写
-            return {k: v.lower() if v else v for k, v in data.items()}
-        except (json.JSONDecodeError, IOError):
+            data = loads(self.state_file.read_bytes())
+            # 内容不是 {类型: 标签} 时视为损坏的状态文件；确保标签为小写
+            if not isinstance(data, dict):
+                return {}
+            state = {k: v.lower() for k, v in data.items() if isinstance(v, str)}
+        except (ValueError, OSError):
             return {}
+        
+        self._cache = state
+        self._cache_stamp = stamp
+        return state.copy()
     
     def write_active_key(self, key_type: str, label: str):
         """写入当前激活的密钥状态"""
-        state = self.read_active_keys()
-        state[key_type] = label.lower()
-        self.state_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        with self.batch() as state:
+            state[key_type] = label.lower()
     
     def remove_active_key(self, key_type: str):
         """移除指定类型的激活状态"""
-        state = self.read_active_keys()
-        if key_type in state:
-            del state[key_type]
-            self.state_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        with self.batch() as state:
+            state.pop(key_type, None)
     
     def update_label(self, old_label: str, new_label: str):
         """更新状态文件中的标签名"""
-        state = self.read_active_keys()
         old_label_lower = old_label.lower()
         new_label_lower = new_label.lower()
         
-        updated = False
-        for key_type, label in state.items():
-            if label == old_label_lower:
-                state[key_type] = new_label_lower
-                updated = True
+        with self.batch() as state:
+            state.update({k: new_label_lower for k, v in state.items() 
+                          if v == old_label_lower})
+    
+    @contextmanager
+    def batch(self) -> Iterator[Dict[str, str]]:
+        """批量修改状态：进入时读取一次，退出时有变化才写入一次
+        
+        用法:
+            with state_manager.batch() as state:
+                state['ed25519'] = 'work'
+                state.pop('rsa', None)
+        """
+        state = self.read_active_keys()
+        original = dict(state)
+        yield state
+        if state != original:
+            self._write(state)
+    
+    def _write(self, state: Dict[str, str]):
+        """写入状态文件，并以写入后的文件信息刷新缓存
+        
+        先写同目录临时文件再 os.replace，中途崩溃不会留下半截的状态文件。临时文件
+        名唯一（.sshm- 前缀），并发运行的多个 sshm 不会互相截断；失败时删除临时文件。
+        状态文件是符号链接时替换其指向的真实文件，已有文件的权限位保持不变。
+        """
+        import tempfile
         
-        if updated:
-            self.state_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        target = os.path.realpath(self.state_file)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.sshm-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dumps(state))
+            try:
+                os.chmod(tmp, stat.S_IMODE(os.stat(target).st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, target)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        st = self.state_file.stat()
+        self._cache = dict(state)
+        self._cache_stamp = (st.st_mtime_ns, st.st_size)
@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异常定义模块
+"""
+
+
+class SSHMError(Exception):
+    """SSH Key Manager 业务错误（可预期的失败，直接向用户展示消息）"""
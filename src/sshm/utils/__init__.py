@@ -10,6 +10,8 @@ from .console import (
     format_timestamp,
     format_size,
     prompt_confirm,
+    format_separator,
+    format_section_header,
     print_separator,
     print_section_header,
     wait_for_key
@@ -23,6 +25,8 @@ __all__ = [
     'format_timestamp',
     'format_size',
     'prompt_confirm',
+    'format_separator',
+    'format_section_header',
     'print_separator',
     'print_section_header',
     'wait_for_key',
@@ -8,6 +8,17 @@ import sys
 import io
 import re
 from datetime import datetime
+from typing import Union
+
+
+# 密钥文件名：id_<类型>[.<标签>]
+_KEY_PATTERN = re.compile(r'^id_(rsa|ed25519|ecdsa|dsa)(\.\w+)?$')
+
+# Windows 下的单键读取（msvcrt 仅 Windows 提供），导入时绑定一次
+try:
+    from msvcrt import getch as _getch
+except ImportError:
+    _getch = None
 
 
 def setup_windows_console():
@@ -15,42 +26,58 @@ def setup_windows_console():
     if sys.platform != 'win32':
         return
     
+    # 已是 UTF-8 输出（Windows Terminal、PYTHONUTF8=1 等）时无需处理
+    encoding = (getattr(sys.stdout, 'encoding', None) or '').lower()
+    if encoding.replace('-', '') in ('utf8', 'utf_8'):
+        return
+    
     try:
         import ctypes
-        kernel32 = ctypes.windll.kernel32
+        from ctypes import wintypes
+        
+        # 独立的 WinDLL 实例：声明参数类型不会影响 ctypes.windll 的全局共享对象
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        for func in (kernel32.SetConsoleOutputCP, kernel32.SetConsoleCP):
+            func.argtypes = [wintypes.UINT]
+            func.restype = wintypes.BOOL
         
         # 设置控制台代码页为 UTF-8 (65001)
         kernel32.SetConsoleOutputCP(65001)
         kernel32.SetConsoleCP(65001)
         
-        # 重新包装 stdout/stderr
-        if hasattr(sys.stdout, 'buffer'):
-            sys.stdout = io.TextIOWrapper(
-                sys.stdout.buffer,
-                encoding='utf-8',
-                errors='replace',
-                line_buffering=True,
-                write_through=True
-            )
-        if hasattr(sys.stderr, 'buffer'):
-            sys.stderr = io.TextIOWrapper(
-                sys.stderr.buffer,
-                encoding='utf-8',
-                errors='replace',
-                line_buffering=True,
-                write_through=True
-            )
+        # 切换 stdout/stderr 编码：管道输出时也需要，否则 emoji 编码失败；
+        # 只有交互终端才按行刷新，重定向/管道时保持块缓冲，避免每行一次系统调用
+        sys.stdout = _reconfigure_utf8(sys.stdout, line_buffering=sys.stdout.isatty())
+        sys.stderr = _reconfigure_utf8(sys.stderr, line_buffering=True)
     except Exception:
         pass  # 静默失败
 
 
+def _reconfigure_utf8(stream, line_buffering: bool):
+    """将文本流切换为 UTF-8 输出
+    
+    Python 3.7+ 原地 reconfigure（不替换流对象，已缓冲的内容会先刷出）；
+    3.6 没有 reconfigure，退回包装底层 buffer。
+    """
+    if hasattr(stream, 'reconfigure'):
+        stream.reconfigure(encoding='utf-8', errors='replace',
+                           line_buffering=line_buffering)
+        return stream
+    if hasattr(stream, 'buffer'):
+        return io.TextIOWrapper(stream.buffer, encoding='utf-8', errors='replace',
+                                line_buffering=line_buffering)
+    return stream
+
+
 def get_key_pattern():
-    """获取密钥文件名匹配模式"""
-    return re.compile(r'^id_(rsa|ed25519|ecdsa|dsa)(\.\w+)?$')
+    """获取密钥文件名匹配模式（模块加载时编译一次）"""
+    return _KEY_PATTERN
 
 
-def format_timestamp(dt: datetime) -> str:
-    """格式化时间戳"""
+def format_timestamp(dt: Union[datetime, float]) -> str:
+    """格式化时间戳（接受 datetime 或 st_mtime 等 epoch 秒数）"""
+    if isinstance(dt, (int, float)):
+        dt = datetime.fromtimestamp(dt)
     return dt.strftime('%Y-%m-%d %H:%M:%S')
 
 
@@ -65,25 +92,33 @@ def prompt_confirm(message: str) -> bool:
     return response in ['y', 'yes']
 
 
+def format_separator(char='=', length=80) -> str:
+    """生成分隔线"""
+    return char * length
+
+
+def format_section_header(title: str) -> str:
+    """生成章节标题（上下带分隔线）"""
+    separator = format_separator()
+    return f"{separator}\n{title}\n{separator}"
+
+
 def print_separator(char='=', length=80):
     """打印分隔线"""
-    print(char * length)
+    print(format_separator(char, length))
 
 
 def print_section_header(title: str):
     """打印章节标题"""
-    print_separator()
-    print(title)
-    print_separator()
+    print(format_section_header(title))
 
 
 def wait_for_key():
     """等待用户按键"""
     print("\n按任意键继续...")
-    if sys.platform == 'win32':
+    if _getch is not None:
         try:
-            import msvcrt
-            msvcrt.getch()
+            _getch()
         except:
             input()
     else:
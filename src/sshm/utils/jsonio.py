@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 读写模块 - 优先使用 orjson，未安装时退回标准库 json
+
+两种实现都以 bytes 为输入输出，调用方直接配合 read_bytes()/write_bytes() 使用。
+状态文件与缓存只供程序读取，输出不带缩进。
+解析失败时抛出的异常均为 ValueError 的子类。
+"""
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+
+if orjson is not None:
+    def loads(data: bytes):
+        """解析 JSON（bytes 或 str）"""
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON"""
+        return orjson.dumps(obj)
+else:
+    def loads(data: bytes):
+        """解析 JSON（bytes 或 str）"""
+        return json.loads(data)
+
+    def dumps(obj) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON"""
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
@@ -5,7 +5,9 @@
 """
 
 import os
+import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 from .console import print_section_header, prompt_confirm
@@ -35,7 +37,7 @@ def add_to_path():
 
 
 def _add_to_windows_path(exe_dir: Path):
-    """Windows 环境变量配置"""
+    """Windows 环境变量配置（exe_dir 由 add_to_path 传入，已是 resolve() 后的路径）"""
     import winreg
     
     try:
@@ -56,9 +58,9 @@ def _add_to_windows_path(exe_dir: Path):
         exe_dir_str = str(exe_dir)
         path_entries = [p.strip() for p in current_path.split(';') if p.strip()]
         
-        # 检查路径是否已存在
-        existing_paths = [p for p in path_entries 
-                         if Path(p).resolve() == exe_dir.resolve()]
+        # 检查路径是否已存在：按规范化后的字符串比较，不再对每个条目 resolve()（逐个 stat）
+        target = _normalize_path(exe_dir_str)
+        existing_paths = [p for p in path_entries if _normalize_path(p) == target]
         
         if existing_paths:
             print(f"\n✅ 路径已在环境变量中: {existing_paths[0]}")
@@ -89,9 +91,8 @@ def _add_to_windows_path(exe_dir: Path):
             else:
                 winreg.CloseKey(key)
         else:
-            # 添加新路径到开头
-            path_entries.insert(0, exe_dir_str)
-            new_path = ';'.join(path_entries)
+            # 添加新路径到开头：直接拼接原值，无需重建整个列表
+            new_path = f"{exe_dir_str};{current_path}" if current_path else exe_dir_str
             
             winreg.SetValueEx(key, 'Path', 0, winreg.REG_EXPAND_SZ, new_path)
             winreg.CloseKey(key)
@@ -110,6 +111,11 @@ def _add_to_windows_path(exe_dir: Path):
         print(f"\n❌ 添加失败: {e}")
 
 
+def _normalize_path(path: str) -> str:
+    """规范化 PATH 条目用于比较：展开环境变量，统一分隔符、大小写与末尾斜杠"""
+    return os.path.normcase(os.path.normpath(os.path.expandvars(path)))
+
+
 def _add_to_unix_path(exe_dir: Path):
     """Unix/Linux/macOS 环境变量配置"""
     home = Path.home()
@@ -126,10 +132,12 @@ def _add_to_unix_path(exe_dir: Path):
     
     export_line = f'export PATH="{exe_dir_str}:$PATH"'
     
-    # 检查是否已添加
+    # 检查是否已添加：逐行扫描，命中即停；注释掉的旧条目不算
     if rc_file.exists():
-        content = rc_file.read_text(encoding='utf-8')
-        if exe_dir_str in content:
+        added = re.compile(rf'^[^#]*{re.escape(exe_dir_str)}')
+        with rc_file.open('r', encoding='utf-8') as f:
+            found = any(added.match(line) for line in f)
+        if found:
             print(f"\n✅ 路径已在 {rc_file.name} 中")
             return
     
@@ -139,8 +147,7 @@ def _add_to_unix_path(exe_dir: Path):
     if prompt_confirm("\n是否继续？"):
         try:
             with rc_file.open('a', encoding='utf-8') as f:
-                f.write(f"\n# Added by SSH Key Manager\n")
-                f.write(f"{export_line}\n")
+                f.write(f"\n# Added by SSH Key Manager\n{export_line}\n")
             
             print("\n✅ 已添加到配置文件！")
             print(f"\n💡 执行以下命令使环境变量生效：")
@@ -152,6 +159,21 @@ def _add_to_unix_path(exe_dir: Path):
         print("\n❌ 操作已取消")
 
 
+@lru_cache(maxsize=None)
+def _send_message_timeout():
+    """user32.SendMessageTimeoutW，首次使用时加载并声明参数类型（仅 Windows）"""
+    import ctypes
+    from ctypes import wintypes
+    
+    func = ctypes.WinDLL('user32', use_last_error=True).SendMessageTimeoutW
+    func.argtypes = [
+        wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPCWSTR,
+        wintypes.UINT, wintypes.UINT, ctypes.POINTER(ctypes.c_size_t)
+    ]
+    func.restype = wintypes.LPARAM
+    return func
+
+
 def _broadcast_env_change():
     """广播 Windows 环境变量更新"""
     if sys.platform == 'win32':
@@ -162,9 +184,8 @@ def _broadcast_env_change():
             WM_SETTINGCHANGE = 0x001A
             SMTO_ABORTIFHUNG = 0x0002
             
-            result = ctypes.c_long()
-            SendMessageTimeout = ctypes.windll.user32.SendMessageTimeoutW
-            SendMessageTimeout(
+            result = ctypes.c_size_t()
+            _send_message_timeout()(
                 HWND_BROADCAST,
                 WM_SETTINGCHANGE,
                 0,
@@ -4,18 +4,43 @@
 更新管理模块 - 检查更新和自动更新
 """
 
+import atexit
 import os
 import sys
-import json
-import platform
-import subprocess
-import tempfile
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
-from urllib.request import urlopen, Request
-from urllib.error import URLError
+from typing import TYPE_CHECKING, Optional, Tuple
+
+# urllib.request（连带 http.client、ssl、email）、concurrent.futures、subprocess 等
+# 只在真正访问网络或下载更新时才在函数内导入，缓存命中的普通命令无需加载
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 from ..constants import VERSION
+from ..exceptions import SSHMError
+from .jsonio import dumps, loads
+
+
+# 当前平台（sys.platform 映射）及对应的 Release 资源文件名
+_PLATFORM = {
+    'win32': 'windows',
+    'linux': 'linux',
+    'darwin': 'macos',
+}.get(sys.platform, 'unknown')
+_ASSET_NAMES = {
+    'windows': 'sshm-windows-amd64.exe',
+    'linux': 'sshm-linux-amd64',
+    'macos': 'sshm-macos-amd64',
+}
+
+# 进程内正在进行的后台更新检查：同一进程的多次调用共用一个网络请求
+_inflight: Optional['Future'] = None
+_inflight_lock = threading.Lock()
+_notify_registered = False
+# 进程退出时最多等待后台检查完成的秒数
+_EXIT_WAIT_SECONDS = 2
 
 
 class UpdateManager:
@@ -24,36 +49,25 @@ class UpdateManager:
     GITHUB_API = "https://api.github.com/repos/365tools/SSHKeyManager/releases/latest"
     CACHE_FILE = Path.home() / ".sshm_update_cache"
     CACHE_VALID_HOURS = 24
+    # 超过 CACHE_VALID_HOURS 的缓存仍先返回并在后台刷新，超过该时限则视为无缓存
+    HARD_TTL_HOURS = 24 * 7
     
     def __init__(self):
         self.current_version = VERSION
-        self.platform = self._detect_platform()
+        self._current_parts = self._parse_version(VERSION)
+        self.platform = _PLATFORM
         
-    def _detect_platform(self) -> str:
-        """检测当前平台"""
-        system = platform.system()
-        if system == "Windows":
-            return "windows"
-        elif system == "Linux":
-            return "linux"
-        elif system == "Darwin":
-            return "macos"
-        else:
-            return "unknown"
-    
     def _get_asset_name(self) -> str:
         """获取当前平台的资源文件名"""
-        if self.platform == "windows":
-            return "sshm-windows-amd64.exe"
-        elif self.platform == "linux":
-            return "sshm-linux-amd64"
-        elif self.platform == "macos":
-            return "sshm-macos-amd64"
-        else:
-            raise RuntimeError(f"不支持的平台: {self.platform}")
+        try:
+            return _ASSET_NAMES[self.platform]
+        except KeyError:
+            raise SSHMError(f"不支持的平台: {self.platform}") from None
     
-    def _parse_version(self, version: str) -> Tuple[int, ...]:
-        """解析版本号为元组"""
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _parse_version(version: str) -> Tuple[int, ...]:
+        """解析版本号为元组（结果按版本字符串缓存）"""
         # 移除 'v' 前缀
         version = version.lstrip('v')
         return tuple(map(int, version.split('.')))
@@ -62,33 +76,46 @@ class UpdateManager:
         """比较版本号"""
         try:
             latest_parts = self._parse_version(latest)
-            current_parts = self._parse_version(current)
+            if current == self.current_version:
+                current_parts = self._current_parts
+            else:
+                current_parts = self._parse_version(current)
             return latest_parts > current_parts
         except:
             return False
     
     def _get_cache(self) -> Optional[dict]:
-        """读取缓存的版本信息"""
-        if not self.CACHE_FILE.exists():
-            return None
+        """读取缓存的检查结果
         
+        Returns:
+            属于当前版本且未超过 HARD_TTL_HOURS 的缓存 {for_version, checked_at, result, stale}，
+            否则返回 None。stale 表示已超过 CACHE_VALID_HOURS、需要重新检查
+        """
         try:
-            import time
-            cache_age = time.time() - self.CACHE_FILE.stat().st_mtime
-            if cache_age > self.CACHE_VALID_HOURS * 3600:
-                return None
+            cache = loads(self.CACHE_FILE.read_bytes())
             
-            with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
+            if cache.get('for_version') != self.current_version:
+                return None
+            age = time.time() - cache['checked_at']
+            if age > self.HARD_TTL_HOURS * 3600:
+                return None
+            cache['stale'] = age > self.CACHE_VALID_HOURS * 3600
+            return cache
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
             return None
     
-    def _save_cache(self, data: dict):
-        """保存版本信息到缓存"""
+    def _save_cache(self, result: Optional[dict]):
+        """保存检查结果到缓存（无更新时也记录，避免每次运行都请求网络）"""
+        data = {
+            'for_version': self.current_version,
+            'checked_at': time.time(),
+            'result': result
+        }
+        tmp_file = self.CACHE_FILE.with_name(self.CACHE_FILE.name + '.tmp')
         try:
-            with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f)
-        except:
+            tmp_file.write_bytes(dumps(data))
+            os.replace(tmp_file, self.CACHE_FILE)
+        except OSError:
             pass
     
     def check_update(self, force: bool = False) -> Optional[dict]:
@@ -101,13 +128,14 @@ class UpdateManager:
         Returns:
             如果有更新，返回 {version, download_url, body}，否则返回 None
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取；缓存过期时同步重新检查（先返回旧结果、后台刷新只用于 check_and_notify）
         if not force:
             cache = self._get_cache()
-            if cache:
-                if self._is_newer_version(cache['version'], self.current_version):
-                    return cache
-                return None
+            if cache and not cache['stale']:
+                return self._cached_update(cache)
+        
+        from urllib.error import URLError
+        from urllib.request import Request, urlopen
         
         # 从 GitHub API 获取最新版本
         try:
@@ -115,34 +143,26 @@ class UpdateManager:
             req.add_header('User-Agent', f'SSHKeyManager/{VERSION}')
             
             with urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
+                data = loads(response.read())
             
             latest_version = data['tag_name']
+            result = None
             
-            # 检查是否有更新
-            if not self._is_newer_version(latest_version, self.current_version):
-                return None
-            
-            # 查找当前平台的下载链接
-            asset_name = self._get_asset_name()
-            download_url = None
-            
-            for asset in data.get('assets', []):
-                if asset['name'] == asset_name:
-                    download_url = asset['browser_download_url']
-                    break
-            
-            if not download_url:
-                return None
-            
-            result = {
-                'version': latest_version,
-                'download_url': download_url,
-                'body': data.get('body', ''),
-                'published_at': data.get('published_at', '')
-            }
+            # 检查是否有更新，并查找当前平台的下载链接
+            if self._is_newer_version(latest_version, self.current_version):
+                asset_name = self._get_asset_name()
+                
+                for asset in data.get('assets', []):
+                    if asset['name'] == asset_name:
+                        result = {
+                            'version': latest_version,
+                            'download_url': asset['browser_download_url'],
+                            'body': data.get('body', ''),
+                            'published_at': data.get('published_at', '')
+                        }
+                        break
             
-            # 保存到缓存
+            # 保存到缓存（包括"已是最新"的结果）
             self._save_cache(result)
             
             return result
@@ -153,6 +173,35 @@ class UpdateManager:
         except Exception:
             return None
     
+    def _cached_update(self, cache: dict) -> Optional[dict]:
+        """从缓存中取出仍比当前版本新的更新信息"""
+        result = cache.get('result')
+        if result and self._is_newer_version(result['version'], self.current_version):
+            return result
+        return None
+    
+    def check_update_async(self) -> 'Future':
+        """在后台守护线程中检查更新，立即返回 Future
+        
+        同一进程内重复调用会复用尚未完成（或已完成）的同一次检查。
+        """
+        from concurrent.futures import Future
+        
+        global _inflight
+        with _inflight_lock:
+            if _inflight is None:
+                _inflight = Future()
+                threading.Thread(target=self._run_check, args=(_inflight,),
+                                 daemon=True).start()
+            return _inflight
+    
+    def _run_check(self, future: 'Future'):
+        """后台线程：执行网络检查并把结果交给 future"""
+        try:
+            future.set_result(self.check_update(force=True))
+        except BaseException as e:
+            future.set_exception(e)
+    
     def download_and_update(self, download_url: str) -> bool:
         """
         下载并更新可执行文件
@@ -163,6 +212,11 @@ class UpdateManager:
         Returns:
             是否成功
         """
+        import shutil
+        import subprocess
+        import tempfile
+        from urllib.request import Request, urlopen
+        
         try:
             print(f"⬇️  正在下载...")
             
@@ -173,23 +227,30 @@ class UpdateManager:
             with urlopen(req, timeout=300) as response:
                 total_size = int(response.headers.get('content-length', 0))
                 downloaded = 0
-                chunk_size = 8192
+                chunk_size = 256 * 1024
                 
                 # 创建临时文件
                 temp_fd, temp_path = tempfile.mkstemp(suffix='.exe' if self.platform == 'windows' else '')
                 
-                with open(temp_path, 'wb') as f:
-                    while True:
-                        chunk = response.read(chunk_size)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        # 显示进度
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            print(f"\r  下载进度: {percent:.1f}%", end='', flush=True)
+                with os.fdopen(temp_fd, 'wb') as f:
+                    if total_size <= 0:
+                        # 无法显示进度时由 C 层循环完成读写
+                        shutil.copyfileobj(response, f, chunk_size)
+                    else:
+                        last_print = 0.0
+                        while True:
+                            chunk = response.read(chunk_size)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            downloaded += len(chunk)
+                            
+                            # 显示进度（限制刷新频率，最后一次必定输出）
+                            now = time.monotonic()
+                            if now - last_print >= 0.2 or downloaded >= total_size:
+                                last_print = now
+                                percent = (downloaded / total_size) * 100
+                                print(f"\r  下载进度: {percent:.1f}%", end='', flush=True)
                 
                 print()  # 换行
             
@@ -228,7 +289,6 @@ del "%~f0"
                 
                 # 尝试直接替换
                 try:
-                    import shutil
                     shutil.move(temp_path, current_exe)
                     print("\n✅ 更新完成！")
                     print("请重新运行 sshm")
@@ -247,9 +307,35 @@ del "%~f0"
     def check_and_notify(self):
         """
         检查更新并通知用户（静默检查）
-        在每次运行时调用，不干扰正常使用
+        在每次运行时调用，不干扰正常使用：
+        有缓存时立即按缓存提示（过期则同时在后台刷新）；
+        无缓存时在后台检查，命令结束退出前再提示
         """
-        update_info = self.check_update(force=False)
+        cache = self._get_cache()
+        if cache:
+            self._notify(self._cached_update(cache))
+            if not cache['stale']:
+                return
+        
+        global _notify_registered
+        future = self.check_update_async()
+        with _inflight_lock:
+            if _notify_registered:
+                return
+            _notify_registered = True
+        atexit.register(self._finish_background_check, future, not cache)
+    
+    def _finish_background_check(self, future: 'Future', notify: bool):
+        """退出前短暂等待后台检查写入缓存；超时或失败时静默放弃（下次运行再查）"""
+        try:
+            update_info = future.result(timeout=_EXIT_WAIT_SECONDS)
+        except Exception:
+            return
+        if notify:
+            self._notify(update_info)
+    
+    def _notify(self, update_info: Optional[dict]):
+        """输出新版本提示"""
         if update_info:
             print(f"\n💡 有新版本可用: {update_info['version']} (当前: v{self.current_version})")
             print(f"   运行 'sshm update' 更新到最新版本\n")
@@ -1,5 +1,10 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
 
+# 排除模块列表统一维护在 scripts/build_local.py
+sys.path.insert(0, os.path.join(SPECPATH, 'scripts'))
+from build_local import EXCLUDE_MODULES
 
 a = Analysis(
     ['src\\run_sshm.py'],
@@ -10,7 +15,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDE_MODULES,
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+单元测试 - 运行方式: python -m unittest discover -s tests -t .
+"""
+
+import sys
+from pathlib import Path
+
+# 未安装包时直接从 src 目录导入
+_SRC = str(Path(__file__).resolve().parent.parent / 'src')
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+SSHConfigManager 测试
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from sshm.core.config import SSHConfigManager
+
+
+def _block(label: str, host: str = 'github.com', key: str = '/k/key') -> str:
+    return SSHConfigManager._generate_config_block(label, host, Path(key))
+
+
+class ConfigTestCase(unittest.TestCase):
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_file = Path(self._tmp.name) / 'config'
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def write(self, content: str):
+        self.config_file.write_text(content, encoding='utf-8')
+    
+    def read(self) -> str:
+        return self.config_file.read_text(encoding='utf-8')
+    
+    def manager(self) -> SSHConfigManager:
+        return SSHConfigManager(self.config_file)
+
+
+class DuplicateBlockTest(ConfigTestCase):
+    """同一标签存在多个 sshm 配置块"""
+    
+    def setUp(self):
+        super().setUp()
+        self.write(_block('a', key='/k/old1') + '\n' + _block('b') + '\n' + _block('a', key='/k/old2'))
+    
+    def test_update_keeps_first_and_drops_rest(self):
+        self.manager().update_host('a', 'gitlab.com', Path('/k/new'))
+        
+        content = self.read()
+        self.assertEqual(content.count('# a - Auto-generated'), 1)
+        self.assertIn('IdentityFile /k/new', content)
+        self.assertNotIn('/k/old', content)
+        self.assertLess(content.index('# a - '), content.index('# b - '))
+    
+    def test_remove_deletes_all(self):
+        self.manager().remove_host('a')
+        
+        content = self.read()
+        self.assertNotIn('# a - ', content)
+        self.assertNotIn('Host a\n', content)
+        self.assertIn('# b - Auto-generated', content)
+    
+    def test_rename_renames_all(self):
+        self.manager().rename_host('a', 'z')
+        
+        content = self.read()
+        self.assertEqual(content.count('# z - Auto-generated'), 2)
+        self.assertEqual(content.count('Host z\n'), 2)
+        self.assertNotIn('# a - ', content)
+
+
+class UnindentedBlockTest(ConfigTestCase):
+    """选项行没有缩进的配置块（ssh_config 允许）"""
+    
+    MANAGED = ("# a - Auto-generated by sshm\n"
+               "Host a\n"
+               "HostName github.com\n"
+               "IdentityFile /k/old\n"
+               "\n")
+    USER = ("Host personal\n"
+            "HostName example.com\n"
+            "User me\n")
+    
+    def test_update_replaces_whole_block(self):
+        self.write(self.MANAGED + self.USER)
+        self.manager().update_host('a', 'gitlab.com', Path('/k/new'))
+        
+        content = self.read()
+        self.assertNotIn('/k/old', content)
+        self.assertIn('IdentityFile /k/new', content)
+        self.assertTrue(content.endswith(self.USER))
+    
+    def test_remove_keeps_following_user_host(self):
+        self.write(self.MANAGED + self.USER)
+        self.manager().remove_host('a')
+        
+        self.assertEqual(self.read(), self.USER)
+    
+    def test_untouched_content_is_preserved(self):
+        content = "Include ~/.ssh/extra\n\n" + self.USER + "\n" + self.MANAGED + "# note\nMatch all\nUser x\n"
+        self.write(content)
+        self.manager().update_host('b', 'github.com', Path('/k/b'))
+        
+        self.assertTrue(self.read().startswith(content))
+    
+    def test_get_host_block(self):
+        self.write(self.MANAGED + self.USER)
+        manager = self.manager()
+        
+        self.assertEqual(manager.get_host_block('a'),
+                         "Host a\nHostName github.com\nIdentityFile /k/old")
+        self.assertEqual(manager.get_host_block('personal'), self.USER.rstrip())
+        self.assertIsNone(manager.get_host_block('missing'))
+
+
+class HostBlockCacheTest(ConfigTestCase):
+    """get_host_block 的缓存在文件变化后失效"""
+    
+    def test_reparses_after_change(self):
+        self.write(_block('a', key='/k/one'))
+        manager = self.manager()
+        self.assertIn('/k/one', manager.get_host_block('a'))
+        
+        self.write(_block('a', key='/k/two-longer'))
+        st = self.config_file.stat()
+        os.utime(self.config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        self.assertIn('/k/two-longer', manager.get_host_block('a'))
+    
+    def test_missing_file(self):
+        self.assertIsNone(self.manager().get_host_block('a'))
+
+
+class BatchTest(ConfigTestCase):
+    """with 语句批量修改"""
+    
+    def test_writes_once_on_exit(self):
+        manager = self.manager()
+        with manager:
+            manager.update_host('a', 'github.com', Path('/k/a'))
+            with manager:
+                manager.update_host('b', 'github.com', Path('/k/b'))
+            self.assertFalse(self.config_file.exists())
+            manager.remove_host('a')
+        
+        content = self.read()
+        self.assertNotIn('# a - ', content)
+        self.assertIn('# b - Auto-generated', content)
+    
+    def test_completed_changes_written_on_error(self):
+        manager = self.manager()
+        with self.assertRaises(RuntimeError):
+            with manager:
+                manager.update_host('a', 'github.com', Path('/k/a'))
+                raise RuntimeError
+        
+        self.assertIn('# a - Auto-generated', self.read())
+    
+    def test_no_write_without_changes(self):
+        self.write(_block('a'))
+        mtime = self.config_file.stat().st_mtime_ns
+        manager = self.manager()
+        with manager:
+            manager.remove_host('missing')
+        
+        self.assertEqual(self.config_file.stat().st_mtime_ns, mtime)
+
+
+if __name__ == '__main__':
+    unittest.main()
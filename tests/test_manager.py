@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+SSHKeyManager 测试
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from sshm.core import manager as manager_module
+from sshm.core.manager import SSHKeyManager, _read_origin_url
+
+
+@unittest.skipUnless(shutil.which('ssh-keygen'), "需要 ssh-keygen")
+class AddKeysBulkTest(unittest.TestCase):
+    """add_keys_bulk 并行创建密钥"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.ssh_dir = Path(self._tmp.name) / '.ssh'
+        self.manager = SSHKeyManager(self.ssh_dir)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def _run(self, specs):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.manager.add_keys_bulk(specs)
+        return out.getvalue()
+    
+    def test_duplicate_and_failing_specs(self):
+        # 公钥路径被目录占用：ssh-keygen 保存公钥时失败
+        (self.ssh_dir / 'id_ed25519.bad.pub').mkdir()
+        
+        output = self._run([
+            ('work', 'work@example.com'),
+            ('work', 'work@example.com'),
+            ('bad', 'bad@example.com', 'ed25519'),
+            ('other', 'other@example.com', 'foo'),
+        ])
+        
+        self.assertTrue((self.ssh_dir / 'id_ed25519.work').is_file())
+        self.assertTrue((self.ssh_dir / 'id_ed25519.work.pub').is_file())
+        self.assertIn("❌ 重复的密钥: id_ed25519.work", output)
+        self.assertIn("❌ 不支持的密钥类型: foo", output)
+        # 失败信息来自 ssh-keygen 的 stderr，而不是 "returned non-zero exit status"
+        self.assertIn("❌ 创建失败 (bad): ", output)
+        self.assertIn("id_ed25519.bad.pub", output)
+        self.assertNotIn("non-zero exit status", output)
+        self.assertEqual(output.count("✅ 密钥创建成功"), 1)
+    
+    def test_hosts_written_to_config(self):
+        self._run([
+            ('work', 'work@example.com', 'ed25519', 'github.com'),
+            ('home', 'home@example.com', 'rsa', 'gitlab.com'),
+        ])
+        
+        config = (self.ssh_dir / 'config').read_text(encoding='utf-8')
+        self.assertIn("# work - Auto-generated", config)
+        self.assertIn("# home - Auto-generated", config)
+        self.assertTrue((self.ssh_dir / 'id_rsa.home').is_file())
+
+
+
+@unittest.skipUnless(shutil.which('git'), "需要 git")
+class OriginUrlTest(unittest.TestCase):
+    """_read_origin_url 直接读取 .git/config，无法可靠解析时交给 git"""
+    
+    URL = 'git@github.com:user/repo.git'
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.repo = root / 'repo'
+        self.home = root / 'home'
+        self.home.mkdir()
+        
+        # 隔离用户与系统级 git 配置
+        env = mock.patch.dict(os.environ, {
+            'HOME': str(self.home),
+            'XDG_CONFIG_HOME': str(self.home / '.config'),
+            'GIT_CONFIG_NOSYSTEM': '1',
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        manager_module._global_git_config_rewrites.cache_clear()
+        self.addCleanup(manager_module._global_git_config_rewrites.cache_clear)
+        
+        self.git('init', '-q', str(self.repo), cwd=root)
+        self.git('remote', 'add', 'origin', self.URL)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    def git(self, *args, cwd=None):
+        subprocess.run(['git', *args], cwd=cwd or self.repo, check=True,
+                       stdout=subprocess.DEVNULL)
+    
+    def test_plain_config_read_without_git(self):
+        with mock.patch.object(manager_module.subprocess, 'run',
+                               side_effect=AssertionError("不应调用 git")):
+            self.assertEqual(_read_origin_url(self.repo), self.URL)
+            self.assertEqual(SSHKeyManager._get_origin_url(self.repo), self.URL)
+    
+    def test_insteadof_falls_back_to_git(self):
+        self.git('config', 'url.git@gitlab.com:.insteadOf', 'git@github.com:')
+        
+        self.assertIsNone(_read_origin_url(self.repo))
+        self.assertEqual(SSHKeyManager._get_origin_url(self.repo),
+                         'git@gitlab.com:user/repo.git')
+    
+    def test_include_falls_back_to_git(self):
+        extra = Path(self._tmp.name) / 'extra.gitconfig'
+        extra.write_text('[remote "origin"]\n\turl = git@example.com:other/repo.git\n',
+                         encoding='utf-8')
+        self.git('config', 'include.path', str(extra))
+        
+        self.assertIsNone(_read_origin_url(self.repo))
+        # 与 git 的解析结果一致：include 在后，覆盖前面的 url
+        expected = subprocess.run(
+            ['git', '-C', str(self.repo), 'remote', 'get-url', 'origin'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(SSHKeyManager._get_origin_url(self.repo), expected)
+    
+    def test_global_insteadof_falls_back_to_git(self):
+        (self.home / '.gitconfig').write_text(
+            '[url "git@gitlab.com:"]\n\tinsteadOf = git@github.com:\n', encoding='utf-8')
+        
+        self.assertIsNone(_read_origin_url(self.repo))
+        self.assertEqual(SSHKeyManager._get_origin_url(self.repo),
+                         'git@gitlab.com:user/repo.git')
+    
+    def test_quoted_value_falls_back(self):
+        self.git('config', 'remote.origin.url', 'git@github.com:user/my repo;x.git')
+        
+        self.assertIsNone(_read_origin_url(self.repo))
+        self.assertEqual(SSHKeyManager._get_origin_url(self.repo),
+                         'git@github.com:user/my repo;x.git')
+    
+    def test_worktree_falls_back(self):
+        worktree = Path(self._tmp.name) / 'wt'
+        self.git('-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q',
+                 '--allow-empty', '-m', 'init')
+        self.git('worktree', 'add', '-q', str(worktree))
+        
+        self.assertIsNone(_read_origin_url(worktree))
+        self.assertEqual(SSHKeyManager._get_origin_url(worktree), self.URL)
+    
+    def test_missing_origin_raises(self):
+        self.git('remote', 'remove', 'origin')
+        
+        self.assertIsNone(_read_origin_url(self.repo))
+        with self.assertRaises(subprocess.CalledProcessError):
+            SSHKeyManager._get_origin_url(self.repo)
+
+
+if __name__ == '__main__':
+    unittest.main()
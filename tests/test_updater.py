@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+UpdateManager 缓存测试
+"""
+
+import io
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from sshm.utils import updater as updater_module
+from sshm.utils.jsonio import dumps
+from sshm.utils.updater import UpdateManager
+
+
+CACHED = {'version': 'v98.0.0', 'download_url': 'https://example.com/cached',
+          'body': '', 'published_at': ''}
+
+
+def _release(tag: str) -> bytes:
+    """GitHub releases/latest 接口的响应内容"""
+    return dumps({
+        'tag_name': tag,
+        'assets': [{'name': 'sshm-linux-amd64',
+                    'browser_download_url': f'https://example.com/{tag}'}],
+    })
+
+
+class UpdateCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.updater = UpdateManager()
+        self.updater.platform = 'linux'
+        self.updater.CACHE_FILE = Path(self._tmp.name) / '.sshm_update_cache'
+        
+        # 网络请求返回固定的新版本，并记录调用次数
+        response = mock.MagicMock()
+        response.__enter__.return_value.read.return_value = _release('v99.0.0')
+        patcher = mock.patch('urllib.request.urlopen', return_value=response)
+        self.urlopen = patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        # 进程级的后台检查状态在每个用例间重置
+        self._reset_inflight()
+        self.addCleanup(self._reset_inflight)
+        patcher = mock.patch.object(updater_module.atexit, 'register')
+        self.atexit_register = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        self._tmp.cleanup()
+    
+    @staticmethod
+    def _reset_inflight():
+        updater_module._inflight = None
+        updater_module._notify_registered = False
+    
+    def write_cache(self, age_hours: float, result=CACHED, version=None):
+        self.updater.CACHE_FILE.write_bytes(dumps({
+            'for_version': version or self.updater.current_version,
+            'checked_at': time.time() - age_hours * 3600,
+            'result': result,
+        }))
+    
+    def notify(self) -> str:
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.updater.check_and_notify()
+        return out.getvalue()
+    
+    def test_fresh_cache(self):
+        self.write_cache(1)
+        
+        self.assertEqual(self.updater.check_update(), CACHED)
+        self.assertIn('v98.0.0', self.notify())
+        self.urlopen.assert_not_called()
+        self.assertIsNone(updater_module._inflight)
+    
+    def test_stale_cache_check_update_fetches(self):
+        self.write_cache(UpdateManager.CACHE_VALID_HOURS + 1)
+        
+        info = self.updater.check_update()
+        self.assertEqual(info['version'], 'v99.0.0')
+        self.urlopen.assert_called_once()
+        self.assertIsNone(updater_module._inflight)
+        # 新结果已写回缓存
+        self.assertFalse(self.updater._get_cache()['stale'])
+    
+    def test_stale_cache_notify_revalidates_in_background(self):
+        self.write_cache(UpdateManager.CACHE_VALID_HOURS + 1)
+        
+        output = self.notify()
+        self.assertIn('v98.0.0', output)
+        
+        info = updater_module._inflight.result(timeout=5)
+        self.assertEqual(info['version'], 'v99.0.0')
+        # 已按缓存提示过，退出时不再重复提示
+        self.atexit_register.assert_called_once()
+        self.assertIs(self.atexit_register.call_args[0][2], False)
+    
+    def test_hard_expired_cache(self):
+        self.write_cache(UpdateManager.HARD_TTL_HOURS + 1)
+        
+        self.assertIsNone(self.updater._get_cache())
+        self.assertEqual(self.notify(), '')
+        
+        callback, future, notify = self.atexit_register.call_args[0]
+        self.assertIs(notify, True)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            callback(future, notify)
+        self.assertIn('v99.0.0', out.getvalue())
+        
+        self.urlopen.reset_mock()
+        self.assertEqual(self.updater.check_update()['version'], 'v99.0.0')
+        self.urlopen.assert_not_called()
+    
+    def test_cache_for_other_version_ignored(self):
+        self.write_cache(1, version='0.0.1')
+        
+        self.assertIsNone(self.updater._get_cache())
+        self.assertEqual(self.updater.check_update()['version'], 'v99.0.0')
+        self.urlopen.assert_called_once()
+    
+    def test_up_to_date_result_cached(self):
+        self.write_cache(1, result=None)
+        
+        self.assertIsNone(self.updater.check_update())
+        self.assertEqual(self.notify(), '')
+        self.urlopen.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()